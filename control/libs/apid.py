@@ -1,19 +1,24 @@
 import configparser
 
+from libs.ring_buffer import RingBuffer
+
 class APID:
     def __init__(self, ros_handler):
         self.RH = ros_handler
         
         self.set_configs()
 
-        self.error_history = []
+        # integral window with a running sum
+        self.error_history = RingBuffer(int(self.window_size))
 
         self.dKp, self.dKi, self.dKd = 0, 0, 0
         self.ddKp, self.ddKi, self.ddKd = 0, 0, 0
 
-        self.errs = [-1, -1, -1, -1, -1] 
-        self.outs = [-1, -1, -1, -1, -1]
-        self.ctrls = [-1, -1, -1, -1, -1]
+        # last four values, errs/outs/ctrls[k] is the one k ticks ago
+        self.errs = (-1, -1, -1, -1)
+        self.outs = (-1, -1, -1, -1)
+        self.ctrls = (-1, -1, -1, -1)
+        self.ctrl = -1  # the output is not fed back into ctrls
 
         self.cnt = 0
         self.ref = 10
@@ -56,32 +61,26 @@ class APID:
         return output
     
     def update_history(self, ref, cur):
-        for i in range(3):
-            self.errs[i] = self.errs[i+1]
-            self.outs[i] = self.outs[i+1]
-            self.ctrls[i] = self.ctrls[i+1]
-        self.errs[3] = ref - cur
-        self.outs[3] = cur
-        self.ctrls[3] = self.ctrls[4]
-        self.error_history.append(ref - cur)
-        if len(self.error_history) > self.window_size:
-            self.error_history.pop(0)
+        self.errs = (ref - cur,) + self.errs[:3]
+        self.outs = (cur,) + self.outs[:3]
+        self.ctrls = (self.ctrl,) + self.ctrls[:3]
+        self.error_history.push(ref - cur)
 
     def calculate_ddK(self):
-        tmp1 = (self.ctrls[1] - self.ctrls[0] + self.epsilon)
-        common_term = (-self.lr) * (-self.errs[2]) * ((self.outs[1] - self.outs[0]) / tmp1)
+        tmp1 = (self.ctrls[2] - self.ctrls[3] + self.epsilon)
+        common_term = (-self.lr) * (-self.errs[1]) * ((self.outs[2] - self.outs[3]) / tmp1)
         
-        self.ddKp = common_term * (self.errs[2] - self.errs[3] + self.epsilon)
-        self.ddKi = common_term * (self.errs[2] + self.epsilon)
-        self.ddKd = common_term * (self.errs[2] - 2 * self.errs[1] + self.errs[0] + self.epsilon)
+        self.ddKp = common_term * (self.errs[1] - self.errs[0] + self.epsilon)
+        self.ddKi = common_term * (self.errs[1] + self.epsilon)
+        self.ddKd = common_term * (self.errs[1] - 2 * self.errs[2] + self.errs[3] + self.epsilon)
 
     def calculate_dK(self):
-        tmp2 = (self.errs[3] - self.errs[2] + self.epsilon)
-        common_term = (-self.lr) * (-self.errs[3]) * ((self.outs[2] - self.outs[1]) / tmp2)
+        tmp2 = (self.errs[0] - self.errs[1] + self.epsilon)
+        common_term = (-self.lr) * (-self.errs[0]) * ((self.outs[1] - self.outs[2]) / tmp2)
 
-        self.dKp = common_term * (self.errs[3] - self.errs[2] + self.epsilon)
-        self.dKi = common_term * (self.errs[3] + self.epsilon)
-        self.dKd = common_term * (self.errs[3] - 2 * self.errs[2] + self.errs[1] + self.epsilon)
+        self.dKp = common_term * (self.errs[0] - self.errs[1] + self.epsilon)
+        self.dKi = common_term * (self.errs[0] + self.epsilon)
+        self.dKd = common_term * (self.errs[0] - 2 * self.errs[1] + self.errs[2] + self.epsilon)
 
     def clip_parameters(self):
         plim, ilim, dlim = self.Kp / 10, self.Ki / 10, self.Kd / 10
@@ -102,9 +101,9 @@ class APID:
         #print(f"{self.final_Kp:.2f}, {self.final_Ki:.2f}, {self.final_Kd:.2f}")
 
     def calculate_output(self):
-        self.error = self.errs[3]
-        self.integral = sum(self.error_history)
-        self.derivative = self.errs[3] - self.errs[2]
+        self.error = self.errs[0]
+        self.integral = self.error_history.sum
+        self.derivative = self.errs[0] - self.errs[1]
 
         # output = (self.Kp * self.error) + (self.Ki * self.integral) + (self.Kd * self.derivative)
         output = (self.final_Kp * self.error) + (self.final_Ki * self.integral) + (self.final_Kd * self.derivative)
@@ -0,0 +1,71 @@
+import os
+import time
+import bisect
+import configparser
+
+import numpy as np
+
+SECTION = 'GainSchedule.'
+ROWS = ['speed', 'lfd', 'lfd_offset', 'steer_gain']
+
+
+def read_tables(config_file_path):
+    # {schedule: (4, n) array of the ROWS} from the [GainSchedule.<schedule>] sections
+    config = configparser.ConfigParser()
+    config.read(config_file_path)
+    tables = {}
+    for section in config.sections():
+        if not section.startswith(SECTION):
+            continue
+        rows = [[float(value) for value in config[section][row].split(',')] for row in ROWS]
+        # checked here, older numpy turns ragged rows into an object array instead of raising
+        if any(len(row) != len(rows[0]) for row in rows):
+            raise ValueError(f'[{section}] needs as many values in every row as in speed')
+        table = np.array(rows)
+        if table.shape[1] < 2 or np.any(np.diff(table[0]) <= 0):
+            raise ValueError(f'[{section}] needs at least two increasing speeds')
+        tables[section[len(SECTION):]] = table
+    for schedule in ['curved', 'straight']:
+        if schedule not in tables:
+            raise ValueError(f'[{SECTION}{schedule}] is missing')
+    return tables
+
+
+class GainSchedule:
+    # (lane, curved, speed) -> (lfd, lfd_offset, steer_gain) tables from config.ini, linear in the speed (kph)
+    # between the breakpoints and held outside them. a curved lane without its own curved_lane<n> table
+    # uses curved. the file is checked for changes every reload_period seconds and the tables are
+    # swapped in whole, a file that does not parse keeps the tables in use
+    def __init__(self, config_file_path='./config.ini', reload_period=1.0):
+        self.config_file_path = config_file_path
+        self.reload_period = reload_period
+        self.mtime = os.path.getmtime(config_file_path)
+        self.set_tables(read_tables(config_file_path))
+        self.checked = time.monotonic()
+
+    def set_tables(self, tables):
+        # plain lists per table, numpy's per call overhead is larger than interpolating three values
+        self.tables = {schedule: (table[0].tolist(), table[1:].T.tolist()) for schedule, table in tables.items()}
+
+    def poll(self):
+        now = time.monotonic()
+        if now - self.checked < self.reload_period:
+            return False
+        self.checked = now
+        try:
+            mtime = os.path.getmtime(self.config_file_path)
+            if mtime == self.mtime:
+                return False
+            self.mtime = mtime
+            self.set_tables(read_tables(self.config_file_path))
+        except (OSError, ValueError, KeyError, configparser.Error):
+            return False
+        return True
+
+    def lookup(self, lane, curved, speed):
+        speeds, gains = self.tables['straight']
+        if curved:
+            speeds, gains = self.tables.get(f'curved_lane{lane}', self.tables['curved'])
+        i = min(max(bisect.bisect_left(speeds, speed), 1), len(speeds) - 1)
+        w = min(max((speed - speeds[i-1]) / (speeds[i] - speeds[i-1]), 0.0), 1.0)
+        return tuple(a + w * (b - a) for a, b in zip(gains[i-1], gains[i]))
@@ -0,0 +1,25 @@
+class RingBuffer:
+    # fixed size window, push overwrites the oldest value. the sum is kept running; once per wrap the
+    # slots are in push order again and it is recomputed from them, so rounding does not build up
+    # and it equals summing the window oldest first there
+    def __init__(self, size):
+        self.size = size
+        self.values = [0.0] * size
+        self.head = 0
+        self.count = 0
+        self.sum = 0.0
+
+    def __len__(self):
+        return self.count
+
+    def push(self, value):
+        old = self.values[self.head]
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+            self.sum += value
+        elif self.head == 0:
+            self.sum = sum(self.values)
+        else:
+            self.sum += value - old
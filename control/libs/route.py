@@ -0,0 +1,94 @@
+import numpy as np
+
+# arc length from the route start within which the planning origin is looked for
+ORIGIN_WINDOW = 50.0
+
+class Route:
+    # planned route as an (N, 2) array with the arc length of every point from the first one,
+    # kappa and velocity are the planned values per point (nan when not sent). stamp and origin
+    # (x, y, heading) are the vehicle pose the route was planned from, stamp 0 when unknown
+    def __init__(self, xy, kappa=None, velocity=None, s=None, stamp=0.0, origin=None):
+        self.xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        self.kappa = np.full(len(self.xy), np.nan) if kappa is None else kappa
+        self.velocity = np.full(len(self.xy), np.nan) if velocity is None else velocity
+        if s is None:
+            s = np.empty(len(self.xy))
+        self.s = s
+        if len(self.xy) > 0:
+            self.s[0] = 0
+            np.cumsum(np.hypot(*np.diff(self.xy, axis=0).T), out=self.s[1:])
+        self.stamp = stamp
+        self.origin = origin
+        # arc length of the route point nearest to where the vehicle was when it was planned. the route
+        # starts there, only its beginning is searched so a later part crossing that spot is not taken
+        self.origin_s = 0.0
+        if origin is not None and len(self.xy) > 0:
+            self.origin_s = float(self.s[self.nearest(origin, 0, int(np.searchsorted(self.s, ORIGIN_WINDOW)) + 1)])
+
+    def __len__(self):
+        return len(self.xy)
+
+    def nearest(self, point, s_idx=0, e_idx=None):
+        dists = np.hypot(self.xy[s_idx:e_idx, 0] - point[0], self.xy[s_idx:e_idx, 1] - point[1])
+        return s_idx + int(np.argmin(dists))
+
+    def anchor(self, point, stamp, velocity, back=5.0, ahead=10.0, jump_threshold=10.0):
+        # index of the route point the vehicle is at now. the route was planned from an older pose, so the
+        # vehicle is expected velocity * age further along it than its origin and only the points around
+        # there are searched; a full search when the route is unstamped or the guess does not hold
+        if len(self.xy) == 0:
+            return 0
+        if self.stamp > 0 and stamp > 0:
+            s_guess = self.origin_s + velocity * max(stamp - self.stamp, 0.0)
+            s_idx, e_idx = np.searchsorted(self.s, [s_guess - back, s_guess + ahead])
+            e_idx = min(max(e_idx, s_idx + 1), len(self.xy))
+            s_idx = min(s_idx, e_idx - 1)
+            idx = self.nearest(point, s_idx, e_idx)
+            if np.hypot(*(self.xy[idx] - point[:2])) <= jump_threshold and (idx < e_idx - 1 or e_idx == len(self.xy)):
+                return idx
+        return self.nearest(point)
+
+    def lookahead(self, point, heading, lfd, start=0, chunk=32):
+        # first point from start on in front of the vehicle (x > 0 in the vehicle frame) at least lfd away,
+        # the one a walk over those points finds. a point is at most the start point's distance plus the arc
+        # length between them away, so the points before lfd - that distance along the route are skipped
+        # without transforming them. returns the index of the point, None if there is none
+        if start >= len(self.xy):
+            return None
+        origin = np.asarray(point, dtype=np.float64)[:2]
+        cos, sin = np.cos(-heading), np.sin(-heading)
+        d0 = np.hypot(*(self.xy[start] - origin))
+        s_idx = max(int(np.searchsorted(self.s, self.s[start] + lfd - d0 - 1e-6)), start)
+        while s_idx < len(self.xy):
+            diff = self.xy[s_idx:s_idx+chunk] - origin
+            x = cos*diff[:, 0] - sin*diff[:, 1]
+            y = sin*diff[:, 0] + cos*diff[:, 1]
+            found = np.nonzero((x > 0) & (np.sqrt(x*x + y*y) >= lfd))[0]
+            if len(found) > 0:
+                return s_idx + int(found[0])
+            s_idx += chunk
+        return None
+
+
+class RouteBuffer:
+    # received routes are copied into reused arrays instead of per point objects. the slots are
+    # filled in turn and a route is only handed out complete, so the route the control loop holds
+    # is not written to before slots-1 newer routes have arrived
+    COLUMNS = 5  # x, y, kappa, velocity, s
+
+    def __init__(self, capacity=512, slots=3):
+        self.slots = [np.empty((capacity, self.COLUMNS)) for _ in range(slots)]
+        self.next = 0
+
+    def fill(self, points, kappa, velocity, stamp=0.0, origin=None):
+        n = len(points)
+        data = self.slots[self.next]
+        if len(data) < n:
+            data = self.slots[self.next] = np.empty((2*n, self.COLUMNS))
+        self.next = (self.next + 1) % len(self.slots)
+
+        data[:n, 0] = [point.x for point in points]
+        data[:n, 1] = [point.y for point in points]
+        data[:n, 2] = kappa if len(kappa) == n else np.nan
+        data[:n, 3] = velocity if len(velocity) == n else np.nan
+        return Route(data[:n, :2], data[:n, 2], data[:n, 3], data[:n, 4], stamp, origin)
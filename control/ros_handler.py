@@ -2,6 +2,7 @@ import rospy
 
 from drive_msgs.msg import *
 from libs.point import Point 
+from libs.route import Route, RouteBuffer
 
 from visualization_msgs.msg import Marker
 
@@ -21,7 +22,9 @@ class ROSHandler():
         self.current_location = []
         self.current_velocity = 0
         self.current_heading = 0
-        self.planned_route = []
+        self.current_stamp = 0.0
+        self.route_buffer = RouteBuffer()
+        self.planned_route = Route([])
         self.target_actuator = Actuator()
         self.lane_number = 2
         self.curve_list = rospy.get_param("/curve_list")
@@ -55,13 +58,15 @@ class ROSHandler():
     def navigation_data_cb(self, msg):
         self.planned_velocity = msg.targetVelocity.data
         self.race_mode = msg.raceMode.data
-        self.planned_route = []
-        for point in msg.plannedRoute:
-            self.planned_route.append(Point(x=point.x, y=point.y))
+        # swapped in whole, the control loop reads either the previous or the new route
+        origin = (msg.currentLocation.x, msg.currentLocation.y, msg.currentHeading.data)
+        self.planned_route = self.route_buffer.fill(msg.plannedRoute, msg.plannedKappa, msg.plannedVelocity,
+                                                    msg.header.stamp.to_sec(), origin)
     
     def vehicle_state_cb(self, msg):
         self.current_velocity = msg.velocity.data
         self.current_heading = msg.heading.data
+        self.current_stamp = msg.header.stamp.to_sec()
         self.current_location = Point(x=msg.enu.x, y=msg.enu.y)
     
     def publish(self, acc, steer):
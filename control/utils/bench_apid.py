@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+toppath = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(toppath)
+
+from libs.apid import APID
+
+WINDOWS = [5, 50, 500, 5000]
+TICKS = 20000
+
+
+# previous list based history, kept for comparison
+class LegacyAPID(APID):
+    def __init__(self, ros_handler):
+        super().__init__(ros_handler)
+        self.error_history = []
+        self.errs = [-1, -1, -1, -1, -1]
+        self.outs = [-1, -1, -1, -1, -1]
+        self.ctrls = [-1, -1, -1, -1, -1]
+
+    def update_history(self, ref, cur):
+        for i in range(3):
+            self.errs[i] = self.errs[i+1]
+            self.outs[i] = self.outs[i+1]
+            self.ctrls[i] = self.ctrls[i+1]
+        self.errs[3] = ref - cur
+        self.outs[3] = cur
+        self.ctrls[3] = self.ctrls[4]
+        self.error_history.append(ref - cur)
+        if len(self.error_history) > self.window_size:
+            self.error_history.pop(0)
+
+    def calculate_ddK(self):
+        tmp1 = (self.ctrls[1] - self.ctrls[0] + self.epsilon)
+        common_term = (-self.lr) * (-self.errs[2]) * ((self.outs[1] - self.outs[0]) / tmp1)
+        self.ddKp = common_term * (self.errs[2] - self.errs[3] + self.epsilon)
+        self.ddKi = common_term * (self.errs[2] + self.epsilon)
+        self.ddKd = common_term * (self.errs[2] - 2 * self.errs[1] + self.errs[0] + self.epsilon)
+
+    def calculate_dK(self):
+        tmp2 = (self.errs[3] - self.errs[2] + self.epsilon)
+        common_term = (-self.lr) * (-self.errs[3]) * ((self.outs[2] - self.outs[1]) / tmp2)
+        self.dKp = common_term * (self.errs[3] - self.errs[2] + self.epsilon)
+        self.dKi = common_term * (self.errs[3] + self.epsilon)
+        self.dKd = common_term * (self.errs[3] - 2 * self.errs[2] + self.errs[1] + self.epsilon)
+
+    def calculate_output(self):
+        self.error = self.errs[3]
+        self.integral = sum(self.error_history)
+        self.derivative = self.errs[3] - self.errs[2]
+        output = (self.final_Kp * self.error) + (self.final_Ki * self.integral) + (self.final_Kd * self.derivative)
+        self.cur += output
+        return max(-100, min(output, 100))
+
+def run(cls, window, refs, curs):
+    rh = SimpleNamespace(system_mode=1, kiapi_signal=0, race_mode='to_goal', planned_velocity=0, current_velocity=0)
+    controller = cls(rh)
+    # scale Ki as set_configs does for the configured window
+    controller.Ki = controller.Ki * controller.window_size / window
+    controller.window_size = float(window)
+    if cls is APID:
+        controller.error_history = type(controller.error_history)(window)
+    outputs = []
+    start_time = time.perf_counter()
+    for ref, cur in zip(refs, curs):
+        rh.planned_velocity, rh.current_velocity = ref, cur
+        outputs.append(controller.execute())
+    return (time.perf_counter() - start_time) / len(refs), np.array(outputs)
+
+def main():
+    os.chdir(toppath)
+    rng = np.random.default_rng(0)
+    refs = np.repeat(rng.uniform(0, 30, TICKS // 200), 200).tolist()
+    curs = (np.array(refs) + rng.normal(0, 1.5, TICKS)).tolist()
+    for window in WINDOWS:
+        legacy_t, legacy = run(LegacyAPID, window, refs, curs)
+        ring_t, ring = run(APID, window, refs, curs)
+        print(f'[window {window}] list {legacy_t*1e6:7.2f} us/tick, ring buffer {ring_t*1e6:7.2f} us/tick, '
+              f'max output diff {np.max(np.abs(ring - legacy)):.2e} (same {np.sum(ring == legacy)}/{TICKS})')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+import numpy as np
+
+toppath = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(toppath)
+
+from libs.gain_schedule import GainSchedule
+
+CASES = [(1, True), (2, True), (3, True), (4, True), (2, False)]
+SPEEDS = np.linspace(0, 150, 3001)
+
+
+# previous per lane formulas, kept for comparison (lfd_gain 0.51, min_lfd 18, max_lfd 45)
+def legacy_gains(lane, curved, vehicle_speed):
+    if curved and lane == 1:
+        lfd = min(max(0.2 * vehicle_speed + 14, 28), 34)
+        lfd_offset = 1
+    elif curved and lane == 2:
+        if vehicle_speed < 80:
+            lfd = 1.500e-03*vehicle_speed**3 -2.700e-01*vehicle_speed**2 + 1.635e+01*vehicle_speed -3.030e+02
+        else:
+            lfd = 0.5*vehicle_speed + 5
+        lfd = min(max(lfd, 25), 50)
+        lfd_offset = -8.33333333e-07*vehicle_speed**4 + 2.26666667e-04*vehicle_speed**3 -2.26666667e-02*vehicle_speed**2 + 9.91833333e-01*vehicle_speed -1.52500000e+01
+        lfd_offset = min(max(lfd_offset, 0.8), 0.98)
+    elif curved and lane == 3:
+        lfd = min(max(0.6*vehicle_speed - 3, 20), 45)
+        lfd_offset = min(max(0.005*vehicle_speed + 0.55 + 0.08, 0.8), 0.9)
+    else:
+        lfd = min(max(0.51*vehicle_speed, 18), 45)
+        lfd_offset = 0.95
+    steer_gain = min(max(vehicle_speed * 0.02 + 0.1, 1), 2.2) if vehicle_speed > 30 else 1.0
+    return lfd, lfd_offset, steer_gain
+
+def main():
+    config_file_path = f'{toppath}/config.ini'
+    schedule = GainSchedule(config_file_path)
+    for lane, curved in CASES:
+        start_time = time.perf_counter()
+        legacy = np.array([legacy_gains(lane, curved, v) for v in SPEEDS])
+        legacy_t = (time.perf_counter() - start_time) / len(SPEEDS)
+        start_time = time.perf_counter()
+        table = np.array([schedule.lookup(lane, curved, v) for v in SPEEDS])
+        table_t = (time.perf_counter() - start_time) / len(SPEEDS)
+        diff = np.max(np.abs(table - legacy), axis=0)
+        print(f'[lane {lane}, {"curved" if curved else "straight"}] formulas {legacy_t*1e6:6.2f} us, table {table_t*1e6:6.2f} us, '
+              f'max diff lfd {diff[0]:.4f} m, lfd_offset {diff[1]:.4f}, steer_gain {diff[2]:.4f}')
+
+    # a changed file is picked up by poll, one that does not parse is ignored
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = f'{tmp_dir}/config.ini'
+        shutil.copy(config_file_path, tmp_path)
+        schedule = GainSchedule(tmp_path, reload_period=0.0)
+        before = schedule.lookup(1, True, 80)
+        with open(tmp_path, 'r') as file:
+            text = file.read()
+        with open(tmp_path, 'w') as file:
+            file.write(text.replace('lfd = 28, 28, 28, 34, 34', 'lfd = 28, 28, 30, 36, 36'))
+        os.utime(tmp_path, (time.time() + 1, time.time() + 1))
+        print(f'reload: {schedule.poll()}, curved lane 1 at 80 kph {before} -> {schedule.lookup(1, True, 80)}')
+        broken = {
+            'single speed': '[GainSchedule.curved]\nspeed = 0\n',
+            'missing value': text.replace('lfd = 28, 28, 28, 34, 34', 'lfd = 28, 28, 34, 34'),
+        }
+        for n, (case, broken_text) in enumerate(broken.items()):
+            with open(tmp_path, 'w') as file:
+                file.write(broken_text)
+            os.utime(tmp_path, (time.time() + 2 + n, time.time() + 2 + n))
+            print(f'broken file ({case}): {schedule.poll()}, still {schedule.lookup(1, True, 80)}')
+
+if __name__ == '__main__':
+    main()
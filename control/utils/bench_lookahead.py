@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import math
+
+import numpy as np
+
+toppath = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(toppath)
+
+from libs.point import Point
+from libs.route import Route
+
+LENGTHS = [65, 130, 520, 2080]
+TICKS = 500
+WHEELBASE = 2.72
+
+
+# previous per point lookahead walk, kept for comparison
+def legacy_steering(route, point, heading, lfd, lfd_offset):
+    steering_angle = 0.
+    for path_point in route:
+        diff = path_point - point
+        rotated_diff = diff.rotate(-heading)
+        if rotated_diff.x > 0:
+            dis = rotated_diff.distance()
+            if dis >= lfd:
+                theta = rotated_diff.angle
+                steering_angle = np.arctan2(2*WHEELBASE*np.sin(theta), lfd*lfd_offset)
+                break
+    return steering_angle
+
+def route_steering(route, point, heading, lfd, lfd_offset, stamp=0.0, velocity=0.0):
+    steering_angle = 0.
+    anchor = route.anchor(point, stamp, velocity) if stamp > 0 else 0
+    idx = route.lookahead(point, heading, lfd, anchor)
+    if idx is not None:
+        theta = (Point(*route.xy[idx]) - point).rotate(-heading).angle
+        steering_angle = np.arctan2(2*WHEELBASE*np.sin(theta), lfd*lfd_offset)
+    return steering_angle
+
+def make_route(rng, n, spacing=0.5):
+    # a curvy path from the vehicle ahead, with a few points behind it
+    kappa = np.cumsum(rng.normal(0, 0.002, n))
+    psi = np.cumsum(kappa * spacing)
+    xy = np.cumsum(np.stack([np.cos(psi), np.sin(psi)], axis=1) * spacing, axis=0) - [3 * spacing, 0]
+    return xy
+
+def main():
+    rng = np.random.default_rng(0)
+    for n in LENGTHS:
+        ticks = []
+        for _ in range(TICKS):
+            xy = make_route(rng, n)
+            point = Point(rng.normal(0, 0.5), rng.normal(0, 0.5))
+            heading = math.radians(rng.normal(0, 5))
+            lfd = rng.uniform(18, 50)
+            ticks.append((xy, point, heading, lfd, rng.uniform(0.8, 0.98)))
+        points = [[Point(x, y) for x, y in xy] for xy, *_ in ticks]
+        routes = [Route(xy) for xy, *_ in ticks]
+        # planned 0.2 s before from 3 m further back, as an anchored route sees it at 15 m/s
+        stamped = [Route(xy, stamp=1.0, origin=(point[0] - 3.0, point[1])) for xy, point, *_ in ticks]
+
+        start_time = time.perf_counter()
+        legacy = [legacy_steering(p, *tick[1:]) for p, tick in zip(points, ticks)]
+        legacy_t = (time.perf_counter() - start_time) / TICKS
+        start_time = time.perf_counter()
+        vectorized = [route_steering(r, *tick[1:]) for r, tick in zip(routes, ticks)]
+        vectorized_t = (time.perf_counter() - start_time) / TICKS
+        start_time = time.perf_counter()
+        anchored = [route_steering(r, *tick[1:], stamp=1.2, velocity=15.0) for r, tick in zip(stamped, ticks)]
+        anchored_t = (time.perf_counter() - start_time) / TICKS
+        start_time = time.perf_counter()
+        for xy, *_ in ticks:
+            Route(xy)
+        build_t = (time.perf_counter() - start_time) / TICKS
+
+        same = sum(1 for a, b in zip(legacy, vectorized) if a == b)
+        same_anchored = sum(1 for a, b in zip(legacy, anchored) if a == b)
+        print(f'[{n} points]')
+        print(f'  point walk  : {legacy_t*1000:8.3f} ms/tick')
+        print(f'  route array : {vectorized_t*1000:8.3f} ms/tick (same steering {same}/{TICKS}), '
+              f'{build_t*1000:.3f} ms per received route')
+        print(f'  anchored    : {anchored_t*1000:8.3f} ms/tick (same steering {same_anchored}/{TICKS})')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+toppath = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(toppath)
+
+from libs.point import Point
+from libs.route import Route, RouteBuffer
+
+LENGTHS = [65, 130, 520]
+MESSAGES = 500
+
+
+def make_msg(rng, n):
+    xy = np.cumsum(rng.normal(0.5, 0.1, (n, 2)), axis=0)
+    return SimpleNamespace(plannedRoute=[SimpleNamespace(x=float(x), y=float(y)) for x, y in xy],
+                           plannedKappa=tuple(rng.normal(0, 0.01, n).tolist()),
+                           plannedVelocity=tuple(rng.uniform(5, 30, n).tolist()))
+
+def main():
+    rng = np.random.default_rng(0)
+    for n in LENGTHS:
+        msgs = [make_msg(rng, n) for _ in range(MESSAGES)]
+
+        start_time = time.perf_counter()
+        legacy = [[Point(x=point.x, y=point.y) for point in msg.plannedRoute] for msg in msgs]
+        legacy_t = (time.perf_counter() - start_time) / MESSAGES
+
+        buffer = RouteBuffer()
+        same = 0
+        buffer_t = 0.0
+        for msg, points in zip(msgs, legacy):
+            start_time = time.perf_counter()
+            route = buffer.fill(msg.plannedRoute, msg.plannedKappa, msg.plannedVelocity)
+            buffer_t += time.perf_counter() - start_time
+            expected = Route(points)
+            same += int(np.array_equal(route.xy, expected.xy) and np.array_equal(route.s, expected.s) and
+                        np.array_equal(route.kappa, np.float64(msg.plannedKappa)))
+        buffer_t /= MESSAGES
+
+        print(f'[{n} points]')
+        print(f'  Point list   : {legacy_t*1000:8.3f} ms/message')
+        print(f'  route buffer : {buffer_t*1000:8.3f} ms/message (same route {same}/{MESSAGES})')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+import hashlib
+import json
+import os
+import shutil
+from collections.abc import Mapping
+
+import numpy as np
+
+# bump when the layout below changes, old caches are rebuilt automatically
+FORMAT_VERSION = 4
+# micro lanelet length per map (m), Solchan has always been routed on 15 m cuts
+CUT_DISTS = {'Solchan': 15}
+DEFAULT_CUT_DIST = 45
+# per-waypoint lanelet fields packed into flat arrays
+WAYPOINT_FIELDS = {
+    'waypoints': np.float64,
+    'yaw': np.float64,
+    's': np.float64,
+    'k': np.float64,
+    'leftChange': np.bool_,
+    'rightChange': np.bool_,
+}
+# per-lanelet scalar fields as columns
+ATTRIBUTE_FIELDS = {
+    'laneNo': 'lane_no',
+    'speedLimit': 'speed_limit',
+    'length': 'length',
+}
+# lanelet boundaries, polylines packed per side
+BOUND_FIELDS = {
+    'leftBound': 'left_bound',
+    'rightBound': 'right_bound',
+}
+# lanelet fields that are kept in the arrays, everything else stays in meta.json
+ARRAY_FIELDS = set(WAYPOINT_FIELDS) | set(ATTRIBUTE_FIELDS) | set(BOUND_FIELDS) | \
+    {'group', 'adjacentLeft', 'adjacentRight', 'successor', 'cut_idx'}
+
+
+def cache_key(json_bytes, cut_dist, tile_size):
+    digest = hashlib.sha256(json_bytes)
+    digest.update(f'|v{FORMAT_VERSION}|cut_dist={cut_dist}|tile_size={tile_size}'.encode())
+    return digest.hexdigest()
+
+def offsets(sizes):
+    return np.cumsum([0] + list(sizes)).astype(np.int64)
+
+def compile_map(lmap, mlg, key):
+    # lmap and mlg are the LaneletMap and MicroLaneletGraph of the node that builds the store
+    lanelets = mlg.lanelets
+    ids = list(lanelets.keys())
+    positions = {id_: n for n, id_ in enumerate(ids)}
+
+    arrays = {}
+    arrays['wp_offsets'] = offsets(len(lanelets[id_]['waypoints']) for id_ in ids)
+    for field, dtype in WAYPOINT_FIELDS.items():
+        values = []
+        for id_ in ids:
+            values.extend(lanelets[id_][field])
+        arrays[field] = np.array(values, dtype=dtype)
+    arrays['waypoints'] = arrays['waypoints'].reshape(-1, 2)
+
+    # lanelet attribute tables, neighbours as lanelet positions (-1 for none)
+    arrays['lane_no'] = np.array([lanelets[id_]['laneNo'] for id_ in ids], dtype=np.int64)
+    arrays['speed_limit'] = np.array([lanelets[id_]['speedLimit'] for id_ in ids], dtype=np.float64)
+    arrays['length'] = np.array([lanelets[id_]['length'] for id_ in ids], dtype=np.float64)
+    arrays['group'] = np.array([-1 if lanelets[id_]['group'] is None else lanelets[id_]['group'] for id_ in ids], dtype=np.int64)
+    arrays['adjacent_left'] = np.array([positions.get(lanelets[id_]['adjacentLeft'], -1) for id_ in ids], dtype=np.int64)
+    arrays['adjacent_right'] = np.array([positions.get(lanelets[id_]['adjacentRight'], -1) for id_ in ids], dtype=np.int64)
+
+    successors = [[positions[s_id] for s_id in lanelets[id_]['successor']] for id_ in ids]
+    arrays['successor_offsets'] = offsets(len(s) for s in successors)
+    arrays['successors'] = np.array([s for ss in successors for s in ss], dtype=np.int64)
+
+    arrays['has_cut'] = np.array(['cut_idx' in lanelets[id_] for id_ in ids], dtype=np.bool_)
+    arrays['cut_offsets'] = offsets(len(lanelets[id_].get('cut_idx', [])) for id_ in ids)
+    arrays['cut_idx'] = np.array([pair for id_ in ids for pair in lanelets[id_].get('cut_idx', [])], dtype=np.int64).reshape(-1, 2)
+
+    for field, name in BOUND_FIELDS.items():
+        lines = [line for id_ in ids for line in lanelets[id_][field]]
+        arrays[f'{name}_lanelet_offsets'] = offsets(len(lanelets[id_][field]) for id_ in ids)
+        arrays[f'{name}_offsets'] = offsets(len(line) for line in lines)
+        arrays[f'{name}_points'] = np.array([pt for line in lines for pt in line], dtype=np.float64).reshape(-1, 2)
+
+    # micro lanelet graph in CSR form, nodes only reached as a target are appended after the sources
+    nodes = list(mlg.graph.keys())
+    node_pos = {node: n for n, node in enumerate(nodes)}
+    targets, costs, graph_offsets = [], [], [0]
+    for node, neighbors in mlg.graph.items():
+        for to_id, cost in neighbors.items():
+            if to_id not in node_pos:
+                node_pos[to_id] = len(nodes)
+                nodes.append(to_id)
+            targets.append(node_pos[to_id])
+            costs.append(cost)
+        graph_offsets.append(len(targets))
+    graph_offsets.extend([len(targets)] * (len(nodes) + 1 - len(graph_offsets)))
+    arrays['graph_offsets'] = np.array(graph_offsets, dtype=np.int64)
+    arrays['graph_targets'] = np.array(targets, dtype=np.int64)
+    arrays['graph_costs'] = np.array(costs, dtype=np.float64)
+    # lanelet position of every node and the waypoint range it covers in that lanelet
+    arrays['node_lanelet'] = np.array([positions[node.split('_')[0]] for node in nodes], dtype=np.int64)
+    node_ranges = []
+    for node in nodes:
+        split_id = node.split('_')
+        size = len(lanelets[split_id[0]]['waypoints'])
+        if len(split_id) == 2:
+            s_idx, e_idx = lanelets[split_id[0]]['cut_idx'][int(split_id[1])]
+            node_ranges.append((s_idx, min(e_idx, size)))
+        else:
+            node_ranges.append((0, size))
+    arrays['node_range'] = np.array(node_ranges, dtype=np.int64).reshape(-1, 2)
+
+    arrays['for_viz_offsets'] = offsets(len(points) for points, _ in lmap.for_viz)
+    arrays['for_viz_points'] = np.array([pt for points, _ in lmap.for_viz for pt in points], dtype=np.float64).reshape(-1, 2)
+
+    meta = {
+        'version': FORMAT_VERSION,
+        'key': key,
+        'base_lla': lmap.basella,
+        'precision': lmap.precision,
+        'ids': ids,
+        'nodes': nodes,
+        'sources': len(mlg.graph),
+        'lanelets': {id_: {k: v for k, v in lanelets[id_].items() if k not in ARRAY_FIELDS} for id_ in ids},
+        'for_viz_types': [type_ for _, type_ in lmap.for_viz],
+    }
+    return arrays, meta
+
+def save_store(store_dir, arrays, meta):
+    # built in a temporary directory and renamed into place, so a node never maps a half written store
+    tmp_dir = f'{store_dir}.{os.getpid()}.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name, array in arrays.items():
+        np.save(f'{tmp_dir}/{name}.npy', array)
+    with open(f'{tmp_dir}/meta.json', 'w') as file:
+        json.dump(meta, file)
+
+    if read_meta(store_dir, meta['key']) is not None:
+        # another node built the same store first and may be mapping it now, only a stale one is replaced
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return
+    if os.path.exists(store_dir):
+        old_dir = f'{store_dir}.{os.getpid()}.old'
+        try:
+            os.rename(store_dir, old_dir)
+            shutil.rmtree(old_dir, ignore_errors=True)
+        except OSError:
+            pass
+    try:
+        os.rename(tmp_dir, store_dir)
+    except OSError:
+        # another node renamed its build into place first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def read_meta(store_dir, key):
+    try:
+        with open(f'{store_dir}/meta.json', 'r') as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != FORMAT_VERSION or meta.get('key') != key:
+        return None
+    return meta
+
+
+class Lanelet(Mapping):
+    # one lanelet as the dict the map utils expect, read from the store when a field is asked for and
+    # kept. waypoint fields, cut indices and bounds are views into the mapped arrays, nothing is copied
+    def __init__(self, store, n):
+        self.store = store
+        self.n = n
+        self.fields = store.meta['lanelets'][store.ids[n]]
+        self.values = {}
+
+    def __getitem__(self, key):
+        value = self.values.get(key, self)
+        if value is self:
+            value = self.values[key] = self.read(key)
+        return value
+
+    def read(self, key):
+        store, n = self.store, self.n
+        if key in WAYPOINT_FIELDS:
+            return store.arrays[key][store.wp_offsets_list[n]:store.wp_offsets_list[n+1]]
+        if key in ATTRIBUTE_FIELDS:
+            return store.arrays[ATTRIBUTE_FIELDS[key]][n].item()
+        if key == 'successor':
+            return [store.ids[s] for s in store.successors_list[store.successor_offsets_list[n]:store.successor_offsets_list[n+1]]]
+        if key == 'adjacentLeft' or key == 'adjacentRight':
+            pos = store.adjacent[key][n]
+            return store.ids[pos] if pos >= 0 else None
+        if key == 'group':
+            group = store.group[n].item()
+            return group if group >= 0 else None
+        if key == 'cut_idx':
+            if not store.has_cut_list[n]:
+                raise KeyError(key)
+            return store.cut_idx[store.cut_offsets_list[n]:store.cut_offsets_list[n+1]]
+        if key in BOUND_FIELDS:
+            name = BOUND_FIELDS[key]
+            line_offsets = store.arrays[f'{name}_offsets']
+            s_idx, e_idx = store.arrays[f'{name}_lanelet_offsets'][n:n+2]
+            points = store.arrays[f'{name}_points']
+            return [points[line_offsets[m]:line_offsets[m+1]] for m in range(s_idx, e_idx)]
+        return self.fields[key]
+
+    def keys(self):
+        keys = list(self.fields) + list(WAYPOINT_FIELDS) + list(ATTRIBUTE_FIELDS) + list(BOUND_FIELDS) + \
+            ['successor', 'adjacentLeft', 'adjacentRight', 'group']
+        if self.store.has_cut_list[self.n]:
+            keys.append('cut_idx')
+        return keys
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+
+class MapStore:
+    # <cache_dir>/<map>/: one .npy per array plus meta.json, written once and memory mapped read-only
+    # by every node, so the pages are shared through the page cache instead of copied per process
+    def __init__(self, store_dir, meta):
+        self.store_dir = store_dir
+        self.key = meta['key']
+        self.base_lla = meta['base_lla']
+        self.precision = meta['precision']
+        self.ids = meta['ids']
+        self.positions = {id_: n for n, id_ in enumerate(self.ids)}
+        self.nodes = meta['nodes']
+        self.meta = meta
+        self.arrays = {}
+        for name in os.listdir(store_dir):
+            if name.endswith('.npy'):
+                # plain ndarray views of the maps, indexing a np.memmap is slower
+                self.arrays[name[:-4]] = np.asarray(np.load(f'{store_dir}/{name}', mmap_mode='r'))
+        # per lanelet index tables as lists, scalar lookups into an array are slow
+        self.wp_offsets_list = self.wp_offsets.tolist()
+        self.sizes = np.diff(self.wp_offsets).tolist()
+        self.cut_offsets_list = self.cut_offsets.tolist()
+        self.cut_idx_list = self.cut_idx.tolist()
+        self.has_cut_list = self.has_cut.tolist()
+        self.successor_offsets_list = self.successor_offsets.tolist()
+        self.successors_list = self.successors.tolist()
+        self.adjacent = {'adjacentLeft': self.adjacent_left.tolist(), 'adjacentRight': self.adjacent_right.tolist()}
+        # {node: (lanelet id, s_idx, e_idx)}, the route assembly looks every node up here
+        node_ids = [self.ids[n] for n in self.node_lanelet.tolist()]
+        self.node_spans = {node: (id_, s_idx, e_idx) for node, id_, (s_idx, e_idx) in zip(self.nodes, node_ids, self.node_range.tolist())}
+        # the lanelets dict the map utils expect
+        self.lanelets = {id_: Lanelet(self, n) for n, id_ in enumerate(self.ids)}
+
+    def __getattr__(self, name):
+        arrays = self.__dict__.get('arrays')
+        if arrays is not None and name in arrays:
+            return arrays[name]
+        raise AttributeError(name)
+
+    def build_graph(self, costs=None):
+        # the micro lanelet graph as {node: {to_node: cost}}, costs per edge (graph_costs by default)
+        # for callers that search or change it in python
+        offsets = self.graph_offsets.tolist()
+        targets = self.graph_targets.tolist()
+        costs = (self.graph_costs if costs is None else costs).tolist()
+        graph = {}
+        for n in range(self.meta['sources']):
+            s_idx, e_idx = offsets[n], offsets[n+1]
+            graph[self.nodes[n]] = {self.nodes[t]: c for t, c in zip(targets[s_idx:e_idx], costs[s_idx:e_idx])}
+        return graph
+
+    def edge_sources(self):
+        # node index of the source of every edge
+        return np.repeat(np.arange(len(self.graph_offsets) - 1), np.diff(self.graph_offsets))
+
+    def for_viz(self):
+        offsets = self.for_viz_offsets.tolist()
+        points = self.for_viz_points.tolist()
+        return [(points[offsets[n]:offsets[n+1]], type_) for n, type_ in enumerate(self.meta['for_viz_types'])]
+
+
+def load(file_path, cache_dir, cut_dist, tile_size, build):
+    # keyed on the json content and build parameters; a missing, stale or unreadable store is
+    # rebuilt from the json by whichever node gets there first. build(file_path, cut_dist) returns
+    # the (LaneletMap, MicroLaneletGraph) to compile
+    with open(file_path, 'rb') as file:
+        key = cache_key(file.read(), cut_dist, tile_size)
+    map_name = os.path.splitext(os.path.basename(file_path))[0]
+    store_dir = f'{cache_dir}/{map_name}'
+
+    meta = read_meta(store_dir, key)
+    if meta is None:
+        arrays, meta = compile_map(*build(file_path, cut_dist), key)
+        os.makedirs(cache_dir, exist_ok=True)
+        save_store(store_dir, arrays, meta)
+        meta = read_meta(store_dir, key) or meta
+    return MapStore(store_dir, meta)
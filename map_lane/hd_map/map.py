@@ -1,57 +1,36 @@
-import json
-import pickle
 import os
+import sys
+
 from hd_map.libs.map_utils import *
-from hd_map.libs.lanelet import LaneletMap, TileMap
+from hd_map.libs.lanelet import LaneletMap, WaypointIndex
 from hd_map.libs.micro_lanelet_graph import MicroLaneletGraph
 
+sys.path.append(f'{os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))}/drive_message/libs')
+import map_cache
+
+def build_graph(file_path, cut_dist):
+    lmap = LaneletMap(file_path)
+    return lmap, MicroLaneletGraph(lmap, cut_dist)
+
 class MAP:
     def __init__(self, map):
         file_path = f'./hd_map/maps/{map}.json'
-        pickle_file = f'./hd_map/pkls/{map}.pkl'
+        cache_dir = './hd_map/cache'
         self.tile_size = 5
-        
-        if os.path.exists(pickle_file):
-            with open(pickle_file, 'rb') as file:
-                data = pickle.load(file)
-                self.base_lla = data['base_lla']
-                self.lmap = data['lmap']
-                self.graph = data['graph']
-                self.lanelets = data['lanelets']
-                self.tiles = data['tiles']
-                self.lmap_viz = data['lmap_viz']
-                self.mlmap_viz = data['mlmap_viz']
-        else:
-            with open(file_path, 'r') as file:
-                data = json.load(file)
-
-            self.base_lla = data['base_lla']
-            cut_dist = 45
+        self.cut_dist = map_cache.CUT_DISTS.get(map, map_cache.DEFAULT_CUT_DIST)
 
-            self.lmap = LaneletMap(file_path)
-            tmap = TileMap(self.lmap.lanelets, self.tile_size)
-            mlg = MicroLaneletGraph(self.lmap, cut_dist)
-        
-            self.graph = mlg.graph
-            self.lanelets = mlg.lanelets
-            self.tiles = tmap.tiles
+        self.store = map_cache.load(file_path, cache_dir, self.cut_dist, self.tile_size, build_graph)
+        self.base_lla = self.store.base_lla
+        # graph markers are published once, the dict is only built for them
+        self.graph = self.store.build_graph()
+        self.lanelets = self.store.lanelets
+        self.for_viz = self.store.for_viz()
 
-            self.lmap_viz, self.mlmap_viz = self.get_vizs()
-            
-            with open(pickle_file, 'wb') as file:
-                pickle.dump({
-                    'base_lla': self.base_lla,
-                    'lmap': self.lmap,
-                    'graph': self.graph,
-                    'lanelets': self.lanelets,
-                    'tiles': self.tiles,
-                    'lmap_viz': self.lmap_viz,
-                    'mlmap_viz': self.mlmap_viz
-                }, file)
+        self.lmap_viz, self.mlmap_viz = self.get_vizs()
+        self.waypoint_index = WaypointIndex.from_arrays(self.store.ids, self.store.waypoints, self.store.wp_offsets, self.tile_size)
     
     
     def get_vizs(self):
-        lmap_viz = LaneletMapViz(self.lanelets, self.lmap.for_viz)
+        lmap_viz = LaneletMapViz(self.lanelets, self.for_viz)
         mlmap_viz = MicroLaneletGraphViz(self.lanelets, self.graph)
         return lmap_viz, mlmap_viz
-    
\ No newline at end of file
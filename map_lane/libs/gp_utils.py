@@ -6,8 +6,7 @@ from scipy.ndimage import gaussian_filter1d
 from libs.quadratic_spline_interpolate import QuadraticSplineInterpolate
 
 lanelets = None
-tiles = None
-tile_size = None
+waypoint_index = None
 lane_width = None
 
 def euc_distance(pt1, pt2):
@@ -25,36 +24,29 @@ def find_nearest_idx(pts, pt):
 
     return min_idx
 
-def lanelet_matching(t_pt):
-    row = int(t_pt[0] // tile_size)
-    col = int(t_pt[1] // tile_size)
-
-    min_dist = float('inf')
-    l_id, l_idx, l_pt = None, None, None
-
-    for i in range(-1, 2):
-        for j in range(-1, 2):
-            selected_tile = tiles.get((row+i, col+j))
-            if selected_tile is not None:
-                for id_, data in selected_tile.items():
-                    for idx, pt in enumerate(data['waypoints']):
-                        dist = euc_distance(t_pt, pt)
-                        if dist > 2:
-                            continue
-                        if dist < min_dist:
-                            min_dist = dist
-                            l_id = id_
-                            l_pt = pt
-                            l_idx = data['idx'][idx]
-    if l_id is not None:
-        return (l_id, l_idx, l_pt)
+def lanelet_matching(t_pt, max_dist=2):
+    i = waypoint_index.match((t_pt[0], t_pt[1]), max_dist)
+    if i is not None:
+        l_id, l_idx = waypoint_index.lanelet_of(i)
+        return (l_id, l_idx, tuple(lanelets[l_id]['waypoints'][l_idx]))
     else:
         return None
 
+def lanelets_matching(t_pts, max_dist=2):
+    matched = waypoint_index.match_many([(pt[0], pt[1]) for pt in t_pts], max_dist)
+    result = []
+    for i in matched:
+        if i >= 0:
+            l_id, l_idx = waypoint_index.lanelet_of(i)
+            result.append((l_id, l_idx, tuple(lanelets[l_id]['waypoints'][l_idx])))
+        else:
+            result.append(None)
+    return result
+
 def get_straight_path(idnidx, path_len):
     s_n = idnidx[0]
     s_i = idnidx[1]
-    wps = copy.deepcopy(lanelets[s_n]['waypoints'])
+    wps = lanelets[s_n]['waypoints'].tolist()
     lls_len = len(wps)
     ids = [s_n]*lls_len
     u_n = s_n
@@ -73,7 +65,7 @@ def get_straight_path(idnidx, path_len):
         u_wp = lanelets[u_n]['waypoints']
         lls_len = len(u_wp)
         ids.extend([u_n]*lls_len)
-        wps += u_wp
+        wps += u_wp.tolist()
 
     r = wps[s_i:e_i]
 
@@ -9,8 +9,7 @@ class LaneletHandler:
 
     def setting_values(self):
         gput.lanelets = self.MAP.lanelets
-        gput.tiles = self.MAP.tiles
-        gput.tile_size = self.MAP.tile_size
+        gput.waypoint_index = self.MAP.waypoint_index
 
     def distance(self, x1, y1, x2, y2):
         return math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
@@ -34,6 +33,9 @@ class LaneletHandler:
 
     def refine_heading_by_lane(self, obs_pos):
         idnidx = gput.lanelet_matching(obs_pos)
+        return self.heading_by_matched_lane(idnidx)
+
+    def heading_by_matched_lane(self, idnidx):
         if idnidx is not None:
             waypoints = gput.lanelets[idnidx[0]]['waypoints']
             # curr_lane_num = gput.lanelets[idnidx[0]]['laneNo']
@@ -58,10 +60,14 @@ class LaneletHandler:
 
     def refine_obstacles_heading(self,local_pose,  obstacle_lists):
         refine_obstacles_list = []
+        obs_pts = [[obs[1], obs[2]] for obs_list in obstacle_lists for obs in obs_list]
+        matched = gput.lanelets_matching(obs_pts) if len(obs_pts) > 0 else []
+        n = 0
         for i, obs_list in enumerate(obstacle_lists):
             refine_obstacles = []
             for obs in obs_list:
-                refine_heading = self.refine_heading_by_lane([obs[1], obs[2]]) # insert x,y
+                refine_heading = self.heading_by_matched_lane(matched[n]) # matched by x,y
+                n += 1
                 if refine_heading is not None:
                     if i == 0:
                         x, y = obs[1], obs[2] #refine_heading[1]
@@ -1,38 +1,81 @@
 import os
-import copy
-import csv
+import threading
 import numpy as np
 
 import global_path.libs.gp_utils as gput
+import global_path.libs.trajectory as trajectory
 import global_path
 
 from scipy.interpolate import splprep, splev, interp1d
 
 
 class GlobalPathPlanner():
-    def __init__(self, map_name):
+    def __init__(self, map_name, log_csv=True, bank_list=()):
         self.set_maps(map_name)
-        self.global_path = None
+        self.goal_trees = {}
+        self.bank_list = bank_list
+        self.csv_writer = global_path.libs.save_.shared_writer() if log_csv else None
     
     def set_maps(self, map_name):
         map = global_path.libs.load_map.MAP(map_name)
+        self.map = map
         gput.lanelets = map.lanelets
-        gput.tiles = map.tiles
-        gput.tile_size = map.tile_size
-        gput.graph = map.graph
+        gput.store = map.store
+        gput.waypoint_index = map.waypoint_index
+        # live edge costs: the map's time costs scaled by the traffic factor of the from node
+        self.costs = {node: dict(neighbors) for node, neighbors in map.graph.items()}
+        self.traffic = {}
+        self.lock = threading.Lock()
+        gput.graph = self.costs
         gput.lane_width = 3.25
     
+    def set_goal_trees(self, goal_points):
+        goal_nodes = []
+        for point in goal_points:
+            goal_ll = gput.lanelet_matching(point)
+            if goal_ll is not None:
+                goal_nodes.append(gput.node_matching(goal_ll))
+        with self.lock:
+            self.goal_trees = {node: global_path.libs.graph_search.IncrementalTree(self.costs, self.map.reversed_graph, node, tree)
+                               for node, tree in self.map.build_goal_trees(goal_nodes).items()}
+            for tree in self.goal_trees.values():
+                tree.update(self.traffic)
+
+    def update_traffic(self, objects, min_speed=1.0):
+        # a node occupied by an object slower than the speed limit takes as long as following it through,
+        # only the goal trees around nodes whose factor changed are repaired
+        traffic = {}
+        matched = gput.lanelets_matching([(float(obj['X']), float(obj['Y'])) for obj in objects])
+        for obj, idnidx in zip(objects, matched):
+            if idnidx is None:
+                continue
+            node = gput.node_matching(idnidx)
+            if node not in self.costs:
+                continue
+            factor = self.map.node_speeds[node] / max(float(obj['v']), min_speed)
+            if factor > traffic.get(node, 1.0):
+                traffic[node] = factor
+
+        changed = [node for node in set(traffic) | set(self.traffic) if traffic.get(node, 1.0) != self.traffic.get(node, 1.0)]
+        if len(changed) == 0:
+            return
+        with self.lock:
+            for node in changed:
+                factor = traffic.get(node, 1.0)
+                self.costs[node] = {to_id: cost * factor for to_id, cost in self.map.graph[node].items()}
+            self.traffic = traffic
+            for tree in self.goal_trees.values():
+                tree.update(changed)
+
     def to_csv(self, file_name, trajectory_info):
+        if self.csv_writer is None:
+            return
         top_path = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
         file_path = f'{top_path}/log/{file_name}.csv'
-        with open(file_path, 'w', newline='') as file:
-            writer = csv.writer(file, delimiter=';')
-            writer.writerow(['#x', 'y', 'w_right', 'w_left', 'x_normvec', 'y_normvec', 'alpha', 's', 'psj', 'kappa', 'vx', 'ax'])
-            for tri in trajectory_info:
-                writer.writerow(tri)
+        self.csv_writer.write(file_path, trajectory_info)
     
     def interpolate_path(self, path, sample_rate = 3, smoothing_factor = 30.0, interp_points=10):
-        local_path = np.array([(point[0], point[1]) for point in path])
+        local_path = np.asarray(path, dtype=np.float64)[:, :2]
 
         sampled_indices = np.arange(0, len(local_path), sample_rate)
         sampled_local_path = local_path[sampled_indices]
@@ -43,75 +86,69 @@ class GlobalPathPlanner():
         resampled_indices = np.linspace(0, len(path_interp) - 1, original_length).astype(int)
         resampled_path = path_interp[resampled_indices]
 
-        interp_path = resampled_path.tolist()
-    
-        return interp_path
+        return resampled_path
 
-    def get_shortest_path(self, start, goal, name): 
+    def get_shortest_path(self, start, goal, name, log=True): 
         start_ll = gput.lanelet_matching(start)
         goal_ll = gput.lanelet_matching(goal)
 
         s_node = gput.node_matching(start_ll)
         g_node = gput.node_matching(goal_ll)
 
-        if s_node == g_node:
-            shortest_path_id = ([s_node], 0)
-        else:
-            shortest_path_id = gput.dijkstra(s_node, g_node)
+        with self.lock:
+            if s_node == g_node:
+                shortest_path_id = ([s_node], 0)
+            elif g_node in self.goal_trees:
+                shortest_path_id = self.goal_trees[g_node].walk(s_node, g_node)
+            else:
+                shortest_path_id = gput.dijkstra(s_node, g_node)
 
         if shortest_path_id is not None:
             shortest_path_id = shortest_path_id[0]
-            final_path, final_ids, final_vs = gput.node_to_waypoints(shortest_path_id, start_ll, goal_ll)
-            final_path = final_path[0:-15]
-            final_ids = final_ids[0:-15]
-            final_vs = final_vs[0:-15]
+            spans = gput.trim_spans(gput.node_spans(shortest_path_id), 15)
             if name != 'pit_stop':
-                more_path, _, more_ids, more_vs = gput.get_straight_path(goal_ll, 800, '', 'Right')
-                final_path.extend(more_path)
-                final_ids.extend(more_ids)
-                final_vs.extend(more_vs)
-            final_tr = []
+                more_spans, _ = gput.straight_spans(goal_ll, 800, '', 'Right')
+                spans.extend(more_spans)
+            final_path, final_ids, final_vs = gput.materialize_spans(spans)
             final_path = self.interpolate_path(final_path)
-            copy_final_path = copy.deepcopy(final_path)
-            s = 0
             window_size = 15
-            for i,f in enumerate(final_path):
-                before_after_pts = [copy_final_path[max(0,i-window_size)], copy_final_path[min(len(final_path)-1,i+window_size)]]
-                lw_left, lw_right = gput.get_lane_width(final_ids[i])
-                A, B, theta = gput.calc_norm_vec(before_after_pts)
-                Rk = gput.calc_kappa(f, before_after_pts)
-                vx = gput.convert_kmh_to_ms(final_vs[i])
-                ax = 1.5
-                final_tr.append([f[0], f[1], lw_right, lw_left, A, B, 0, s, theta, Rk, vx, ax])
-                s += 1            
-            self.to_csv(name, final_tr)
+            theta = global_path.libs.curvature.path_heading(final_path, window_size)
+            lanes, lane_w_left, lane_w_right = gput.get_lane_table(final_ids, self.bank_list)
+            final_tr = np.zeros((len(final_path), len(trajectory.COLUMNS)))
+            final_tr[:, trajectory.X:trajectory.Y+1] = final_path
+            final_tr[:, trajectory.W_RIGHT] = lane_w_right
+            final_tr[:, trajectory.W_LEFT] = lane_w_left
+            final_tr[:, trajectory.X_NORMVEC] = np.sin(theta)
+            final_tr[:, trajectory.Y_NORMVEC] = -np.cos(theta)
+            final_tr[:, trajectory.S] = np.arange(len(final_path))
+            final_tr[:, trajectory.PSI] = theta
+            final_tr[:, trajectory.KAPPA] = global_path.libs.curvature.path_kappa(final_path, window_size)
+            final_tr[:, trajectory.VX] = gput.convert_kmh_to_ms(final_vs)
+            final_tr[:, trajectory.AX] = 1.5
+            final_tr = trajectory.Trajectory(final_tr, lanes=lanes)
+            if log:
+                self.to_csv(name, final_tr.data)
             return True, final_tr
         else:
-            return False, []
-
-    def get_remain_distance(self, local_pose):
-        if self.global_path is None:
-            return 99999
-        min_idx = gput.find_nearest_idx(self.global_path, local_pose)
-        return (len(self.global_path)-min_idx)
+            return False, None
 
-    def get_change_point_caution(self, local_path, local_pose, current_vel):
+    def get_change_point_caution(self, local_path, current_vel):
+        # local_path starts at the ego position, its lanelet table replaces matching both points on the map
         change_dist = int(current_vel*3.6*2)
         change_dist = min(change_dist, len(local_path)-1)
 
-        c_idnidx = gput.lanelet_matching(local_path[change_dist])
-        e_idnidx = gput.lanelet_matching(local_pose)
-        if e_idnidx is not None and c_idnidx is not None:
-            e_successor = gput.get_possible_successor(e_idnidx[0])
-            if e_successor is not None:
-                left_lanes, right_lanes, _ = gput.get_whole_neighbor(e_successor)
-                for ll in left_lanes:
-                    #successor = gput.find_most_successor(ll)
-                    if ll == c_idnidx[0]:
-                        return True, 'left', change_dist
-                
-                for rr in right_lanes:
-                    #successor = gput.find_most_successor(rr)
-                    if rr == c_idnidx[0]:
-                        return True, 'right', change_dist
+        c_id = local_path.lanes['lanelet'][change_dist]
+        e_id = local_path.lanes['lanelet'][0]
+        e_successor = gput.get_possible_successor(e_id)
+        if e_successor is not None:
+            left_lanes, right_lanes, _ = gput.get_whole_neighbor(e_successor)
+            for ll in left_lanes:
+                #successor = gput.find_most_successor(ll)
+                if ll == c_id:
+                    return True, 'left', change_dist
+            
+            for rr in right_lanes:
+                #successor = gput.find_most_successor(rr)
+                if rr == c_id:
+                    return True, 'right', change_dist
         return None
\ No newline at end of file
@@ -3,4 +3,7 @@ import global_path.libs.lanelet
 import global_path.libs.micro_lanelet_graph
 import global_path.libs.quadratic_spline_interpolate
 import global_path.libs.load_map
+import global_path.libs.graph_search
+import global_path.libs.trajectory
+import global_path.libs.curvature
 import global_path.libs.save_
\ No newline at end of file
@@ -0,0 +1,66 @@
+import numpy as np
+
+
+def calc_kappa(epoints, npoints1, npoints2):
+    # array version of gp_utils.calc_kappa: epoints (N, 2) with neighbours npoints1, npoints2 (N, 2),
+    # differentiates along x when the segment to npoints2 is x-dominant, along y otherwise
+    epoints = np.asarray(epoints, dtype=np.float64).reshape(-1, 2)
+    npoints1 = np.asarray(npoints1, dtype=np.float64).reshape(-1, 2)
+    npoints2 = np.asarray(npoints2, dtype=np.float64).reshape(-1, 2)
+
+    dx1 = npoints1[:, 0] - epoints[:, 0]
+    dy1 = npoints1[:, 1] - epoints[:, 1]
+    dx2 = npoints2[:, 0] - epoints[:, 0]
+    dy2 = npoints2[:, 1] - epoints[:, 1]
+    degenerate = (dx1 == 0) | (dy1 == 0) | (dx2 == 0) | (dy2 == 0)
+    x_dominant = np.abs(dy2) < np.abs(dx2)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dydx2 = dy2 / dx2
+        dydx1 = dy1 / dx1
+        dydx = (dydx2 + dydx1) / 2
+        d2ydx2 = 2 * (dydx2 - dydx1) / (npoints2[:, 0] - npoints1[:, 0])
+        kappa_x = d2ydx2 / ((1 + dydx**2)**(3/2))
+
+        dxdy2 = dx2 / dy2
+        dxdy1 = dx1 / dy1
+        dxdy = (dxdy2 + dxdy1) / 2
+        d2xdy2 = 2 * (dxdy2 - dxdy1) / (npoints2[:, 1] - npoints1[:, 1])
+        kappa_y = d2xdy2 / ((1 + dxdy**2)**(3/2))
+
+    return np.where(degenerate, 0.0, np.where(x_dominant, kappa_x, kappa_y))
+
+def path_kappa(points, window_size=15):
+    # curvature of every point against the points window_size before and after it (clamped at the ends)
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    idx = np.arange(len(points))
+    before = points[np.maximum(idx - window_size, 0)]
+    after = points[np.minimum(idx + window_size, len(points) - 1)]
+    return calc_kappa(points, before, after)
+
+def path_heading(points, window_size=15):
+    # heading of the chord between the points window_size before and after each point (clamped at the ends),
+    # the array version of gp_utils.calc_norm_vec's theta
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    idx = np.arange(len(points))
+    before = points[np.maximum(idx - window_size, 0)]
+    after = points[np.minimum(idx + window_size, len(points) - 1)]
+    return np.arctan2(after[:, 1] - before[:, 1], after[:, 0] - before[:, 0])
+
+def radius_list(points, base_offset=2, step_size=40, straight_R=99999):
+    # array version of planning_handler.calculate_R_list: radius at i from points i+base_offset,
+    # +step_size and +2*step_size, the tail without enough points ahead repeats the last radius
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    Rs = np.full(len(points), float(straight_R))
+    count = len(points) - 2 * step_size - base_offset
+    if count <= 0:
+        return Rs
+
+    kappa = calc_kappa(points[base_offset:base_offset+count],
+                       points[base_offset+step_size:base_offset+step_size+count],
+                       points[base_offset+2*step_size:base_offset+2*step_size+count])
+    with np.errstate(divide='ignore'):
+        R = np.where(kappa != 0, np.abs(1 / kappa), straight_R)
+    Rs[:count] = R
+    Rs[count:] = R[-1]
+    return Rs
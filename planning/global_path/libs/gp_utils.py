@@ -1,6 +1,5 @@
 import numpy as np
 import copy
-import heapq as hq
 
 import rospy
 from math import *
@@ -12,8 +11,8 @@ from geometry_msgs.msg import Point
 from visualization_msgs.msg import Marker, MarkerArray
 
 lanelets = None
-tiles = None
-tile_size = None
+store = None
+waypoint_index = None
 graph = None
 lane_width = None
 
@@ -33,67 +32,102 @@ def find_nearest_idx(pts, pt):
     return min_idx
 
 def lanelet_matching(t_pt):
-    row = int(t_pt[0] // tile_size)
-    col = int(t_pt[1] // tile_size)
-
-    min_dist = float('inf')
-    l_id, l_idx = None, None
-
-    for i in range(-1, 2):
-        for j in range(-1, 2):
-            selected_tile = tiles.get((row+i, col+j))
-            if selected_tile is not None:
-                for id_, data in selected_tile.items():
-                    for idx, pt in enumerate(data['waypoints']):
-                        dist = euc_distance(t_pt, pt)
-                        if dist < min_dist:
-                            min_dist = dist
-                            l_id = id_
-                            l_idx = data['idx'][idx]
-    if l_id is not None:
-        return (l_id, l_idx)
+    i = waypoint_index.match((t_pt[0], t_pt[1]))
+    if i is not None:
+        return waypoint_index.lanelet_of(i)
     else:
         return None
 
+def lanelets_matching(t_pts):
+    matched = waypoint_index.match_many([(pt[0], pt[1]) for pt in t_pts])
+    return [waypoint_index.lanelet_of(i) if i >= 0 else None for i in matched]
+
 
 def convert_kmh_to_ms(speed_kmh):
     return speed_kmh / 3.6
 
-def get_straight_path(idnidx, path_len, stop_id, prior='Left'):
+def lanelet_size(id_):
+    return store.sizes[store.positions[id_]]
+
+def straight_spans(idnidx, path_len, stop_id, prior='Left'):
+    # the walk of get_straight_path on lanelet lengths only, the waypoints stay in the store
     s_n = idnidx[0]
     s_i = idnidx[1]
-    wps = copy.deepcopy(lanelets[s_n]['waypoints'])
-    lls_len = len(wps)
-    ids = [s_n]*lls_len
-    vs = [lanelets[s_n]['speedLimit']]*lls_len
+    walked = [s_n]
+    lls_len = lanelet_size(s_n)
+    total = lls_len
     u_n = s_n
-    u_i = s_i+int(path_len)#*M_TO_IDX)
+    u_i = s_i+int(path_len)
     e_i = u_i
-        
+
     while u_i >= lls_len:
-        
         _u_n = get_possible_successor(u_n, prior)
         if _u_n == stop_id:
             u_i = lls_len-1
             break
         if _u_n == None:
-            e_i = len(wps)
+            e_i = total
             break
         u_n = _u_n
         u_i -= lls_len
         e_i += u_i
-        u_wp = lanelets[u_n]['waypoints']
-        lls_len = len(u_wp)
-        ids.extend([u_n]*lls_len)
-        v = lanelets[u_n]['speedLimit']
-        vs.extend([v]*lls_len)
-        wps += u_wp
-
-    r = wps[s_i:e_i]
-    path_ids = ids[s_i:e_i]
-    path_vs = vs[s_i:e_i]
+        lls_len = lanelet_size(u_n)
+        walked.append(u_n)
+        total += lls_len
+
+    # [s_i:e_i] of the walked lanelets joined end to end
+    spans = []
+    offset = 0
+    for id_ in walked:
+        size = lanelet_size(id_)
+        s_idx, e_idx = max(s_i-offset, 0), min(e_i-offset, size)
+        if s_idx < e_idx:
+            spans.append((id_, s_idx, e_idx))
+        offset += size
+    return spans, [u_n, u_i]
+
+def node_spans(shortest_path):
+    # consecutive cuts of one lanelet are joined, they are contiguous in the store
+    spans = []
+    for node in shortest_path:
+        id_, s_idx, e_idx = store.node_spans[node]
+        if s_idx >= e_idx:
+            continue
+        if spans and spans[-1][0] == id_ and spans[-1][2] == s_idx:
+            spans[-1] = (id_, spans[-1][1], e_idx)
+        else:
+            spans.append((id_, s_idx, e_idx))
+    return spans
+
+def trim_spans(spans, count):
+    # drops the last count waypoints, like [0:-count] on the materialized path
+    spans = list(spans)
+    while count > 0 and spans:
+        id_, s_idx, e_idx = spans.pop()
+        if e_idx - s_idx > count:
+            spans.append((id_, s_idx, e_idx-count))
+        count -= e_idx - s_idx
+    return spans
+
+def materialize_spans(spans):
+    # one contiguous copy of the spanned waypoints with the lanelet id and speed limit per waypoint
+    if len(spans) == 0:
+        return np.zeros((0, 2)), np.zeros(0, dtype=str), np.zeros(0)
+    ids, s_idxs, e_idxs = zip(*spans)
+    ns = [store.positions[id_] for id_ in ids]
+    starts = [store.wp_offsets_list[n] for n in ns]
+    sizes = [e_idx-s_idx for s_idx, e_idx in zip(s_idxs, e_idxs)]
+    # the store arrays are looked up through MapStore.__getattr__, once and not per span
+    waypoints = store.waypoints
+    points = np.concatenate([waypoints[start+s_idx:start+e_idx] for start, s_idx, e_idx in zip(starts, s_idxs, e_idxs)])
+    ids = np.repeat(ids, sizes)
+    vs = np.repeat(store.speed_limit[ns], sizes)
+    return points, ids, vs
 
-    return r, [u_n, u_i], path_ids, path_vs
+def get_straight_path(idnidx, path_len, stop_id, prior='Left'):
+    spans, end = straight_spans(idnidx, path_len, stop_id, prior)
+    r, path_ids, path_vs = materialize_spans(spans)
+    return r.tolist(), end, path_ids.tolist(), path_vs.tolist()
 
 def get_cut_idx_ids(id):
     idx_list = lanelets[id]['cut_idx']
@@ -151,7 +185,7 @@ def get_pocket_successor(node, prior='Left'):
 
     if successor is not None:
         current_waypoints = lanelets[node]['waypoints']
-        target_point = current_waypoints[-1] if current_waypoints else (0, 0)
+        target_point = current_waypoints[-1] if len(current_waypoints) > 0 else (0, 0)
         
         successor_waypoints = lanelets[successor]['waypoints']
         successor_idx = find_nearest_idx(successor_waypoints, target_point)
@@ -211,57 +245,7 @@ def node_matching(idnidx):
     return node_id
 
 def dijkstra(start, finish):
-    distances = {}
-    previous = {}
-    nodes = []
-
-    for vertex in graph:
-        if vertex == start:
-            distances[vertex] = 0
-            hq.heappush(nodes, [distances[vertex], vertex])
-        else:
-            distances[vertex] = float('inf')
-            hq.heappush(nodes, [distances[vertex], vertex])
-        previous[vertex] = None
-
-    while nodes:
-        current = hq.heappop(nodes)[1]
-
-        if current == finish:
-            path = []
-            if previous[current] is not None:
-                while previous[current]:
-                    path.append(current)
-                    current = previous[current]
-                path.append(start)
-                path.reverse()
-                cost = distances[finish]
-                return (path, cost)
-
-            else:
-                return None
-
-        neighbors = graph[current]
-
-        for neighbor in neighbors:
-            if neighbor == start:
-                continue
-            # cost(start->current) + cost(current->neighbor)
-            bridge_cost = distances[current] + neighbors[neighbor]
-
-            # found shortest path! -> update!
-            if bridge_cost < distances[neighbor]:
-                distances[neighbor] = bridge_cost
-                previous[neighbor] = current
-
-                for node in nodes:
-                    if node[1] == neighbor:
-                        node[0] = bridge_cost
-                        break
-                hq.heapify(nodes)  # heapq relocate
-
-    return None
-
+    return global_path.libs.graph_search.shortest_path(graph, start, finish)
 
 
 
@@ -311,32 +295,8 @@ def filter_same_points(points):
 
 
 def node_to_waypoints(shortest_path, sidnidx, gidnidx):
-    final_path = []
-    final_ids = []
-    final_vs = []
-
-    for i, id in enumerate(shortest_path):
-        alpha_path = []
-        v = 0
-        _id = id
-
-        split_id = id.split('_')
-        
-        if len(split_id) == 2:
-            _id = split_id[0]
-            s_idx, e_idx = (lanelets[_id]['cut_idx'][int(split_id[1])])
-            alpha_path = lanelets[_id]['waypoints'][s_idx:e_idx]
-        else:
-            _id = id
-            alpha_path = lanelets[_id]['waypoints']
-
-        v = lanelets[_id]['speedLimit']
-        lls_len = len(alpha_path)
-        final_vs.extend([v]*lls_len)
-        final_ids.extend([_id]*lls_len)
-        final_path.extend(alpha_path)
-       
-    return final_path, final_ids, final_vs
+    final_path, final_ids, final_vs = materialize_spans(node_spans(shortest_path))
+    return final_path.tolist(), final_ids.tolist(), final_vs.tolist()
 
 def current_lane_number(_id):
     curr_lane_num = lanelets[_id]['laneNo']
@@ -505,6 +465,17 @@ def get_lane_width(id):
     return l_w, r_w
     
 
+def get_lane_table(ids, bank_list=()):
+    # lane attributes and widths per path sample, decided once per distinct lanelet
+    unique_ids, inverse = np.unique(np.asarray(ids, dtype=str), return_inverse=True)
+    lanes = np.zeros(len(unique_ids), dtype=global_path.libs.trajectory.LANE_DTYPE)
+    widths = np.zeros((len(unique_ids), 2))
+    for n, id_ in enumerate(unique_ids.tolist()):
+        l_id, r_id = get_neighbor(id_)
+        lanes[n] = (id_, l_id or '', r_id or '', lanelets[id_]['laneNo'], id_ in bank_list)
+        widths[n] = get_lane_width(id_)
+    return lanes[inverse], widths[inverse, 0], widths[inverse, 1]
+
 def PathViz(waypoints, color):
     return Path(waypoints, 999, 0.2, 1.5, color)
 
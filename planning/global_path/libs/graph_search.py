@@ -0,0 +1,204 @@
+import heapq as hq
+
+
+def build_path(previous, start, finish):
+    path = []
+    current = finish
+    while previous[current]:
+        path.append(current)
+        current = previous[current]
+    path.append(start)
+    path.reverse()
+    return path
+
+def shortest_path(graph, start, finish):
+    # lazy-deletion heap: stale entries are skipped when popped instead of re-heapifying
+    distances = {start: 0}
+    previous = {start: None}
+    visited = set()
+    nodes = [(0, start)]
+
+    while nodes:
+        current = hq.heappop(nodes)[1]
+        if current in visited:
+            continue
+        visited.add(current)
+
+        if current == finish:
+            if previous[current] is not None:
+                return (build_path(previous, start, finish), distances[finish])
+            else:
+                return None
+
+        neighbors = graph.get(current, {})
+        for neighbor in neighbors:
+            if neighbor == start or neighbor in visited:
+                continue
+            # cost(start->current) + cost(current->neighbor)
+            bridge_cost = distances[current] + neighbors[neighbor]
+
+            if bridge_cost < distances.get(neighbor, float('inf')):
+                distances[neighbor] = bridge_cost
+                previous[neighbor] = current
+                hq.heappush(nodes, (bridge_cost, neighbor))
+
+    return None
+
+def reverse_graph(graph):
+    reversed_graph = {}
+    for from_id, data in graph.items():
+        for to_id in data:
+            if reversed_graph.get(to_id) is None:
+                reversed_graph[to_id] = []
+            reversed_graph[to_id].append(from_id)
+    return reversed_graph
+
+def shortest_path_tree(graph, reversed_graph, root, eps=1e-6):
+    # reverse search from root: cost-to-root for every node that can reach it
+    distances = {root: 0}
+    visited = set()
+    nodes = [(0, root)]
+
+    while nodes:
+        current = hq.heappop(nodes)[1]
+        if current in visited:
+            continue
+        visited.add(current)
+
+        for neighbor in reversed_graph.get(current, []):
+            if neighbor in visited:
+                continue
+            bridge_cost = distances[current] + graph[neighbor][current]
+
+            if bridge_cost < distances.get(neighbor, float('inf')):
+                distances[neighbor] = bridge_cost
+                hq.heappush(nodes, (bridge_cost, neighbor))
+
+    next_hops = {node: next_hop(graph, distances, node, eps) for node in distances}
+    return {'distances': distances, 'next_hops': next_hops}
+
+def next_hop(graph, distances, node, eps=1e-6):
+    # the optimal successor with the largest cost-to-root, then the lowest id. the forward search keeps
+    # the predecessor settled first, which is the one with the larger cost-to-root, so at an equal-cost
+    # fork (a lane change taken early or late) this picks the branch it returns
+    hop = None
+    for to_id, cost in graph.get(node, {}).items():
+        if to_id not in distances or abs(cost + distances[to_id] - distances[node]) >= eps:
+            continue
+        if hop is None or distances[to_id] > distances[hop] or (distances[to_id] == distances[hop] and to_id < hop):
+            hop = to_id
+    return hop
+
+def walk_tree(tree, start, finish):
+    distances = tree['distances']
+    next_hops = tree['next_hops']
+    if start == finish or start not in distances:
+        return None
+
+    path = [start]
+    while path[-1] != finish:
+        path.append(next_hops[path[-1]])
+    return (path, distances[start])
+
+
+class IncrementalTree:
+    # shortest path tree to root that is repaired instead of rebuilt when edge costs change: the backward
+    # search of D* Lite (g/rhs values, one priority queue of inconsistent nodes, no heuristic).
+    # update() only queues the nodes whose outgoing costs changed, walk() repairs until its start is
+    # consistent, which covers every node on the routes from there; the rest stays queued for later walks.
+    # graph is shared with the caller, who changes the costs out of some nodes and calls update(nodes)
+    def __init__(self, graph, reversed_graph, root, tree=None, eps=1e-6):
+        self.graph = graph
+        self.reversed_graph = reversed_graph
+        self.root = root
+        self.eps = eps
+        self.queue = []
+        self.pending = set()
+        if tree is None:
+            self.g = {}
+            self.rhs = {root: 0}
+            self.distances = {}
+            self.next_hops = {}
+            hq.heappush(self.queue, (0, root))
+            self.refresh(self.compute())
+        else:
+            # a tree from shortest_path_tree is already consistent
+            self.g = dict(tree['distances'])
+            self.rhs = dict(tree['distances'])
+            self.distances = dict(tree['distances'])
+            self.next_hops = dict(tree['next_hops'])
+
+    @property
+    def tree(self):
+        return {'distances': self.distances, 'next_hops': self.next_hops}
+
+    def lookahead(self, node):
+        g = self.g
+        return min((cost + g.get(to_id, float('inf')) for to_id, cost in self.graph.get(node, {}).items()),
+                   default=float('inf'))
+
+    def update_vertex(self, node):
+        if node != self.root:
+            self.rhs[node] = self.lookahead(node)
+        g, rhs = self.g.get(node, float('inf')), self.rhs.get(node, float('inf'))
+        if g != rhs:
+            hq.heappush(self.queue, (min(g, rhs), node))
+
+    def compute(self, start=None):
+        changed = set()
+        while self.queue:
+            key, node = self.queue[0]
+            g, rhs = self.g.get(node, float('inf')), self.rhs.get(node, float('inf'))
+            # consistent by now, or a stale entry of a node that was queued again with another key
+            if g == rhs or key != min(g, rhs):
+                hq.heappop(self.queue)
+                continue
+            if start is not None:
+                start_g, start_rhs = self.g.get(start, float('inf')), self.rhs.get(start, float('inf'))
+                if start_g == start_rhs and key >= start_g:
+                    break
+            hq.heappop(self.queue)
+            if g > rhs:
+                self.g[node] = rhs
+            else:
+                self.g[node] = float('inf')
+                self.update_vertex(node)
+            changed.add(node)
+            for pred in self.reversed_graph.get(node, []):
+                self.update_vertex(pred)
+        return changed
+
+    def refresh(self, nodes):
+        for node in nodes:
+            g = self.g.get(node, float('inf'))
+            if g < float('inf'):
+                self.distances[node] = g
+            else:
+                self.distances.pop(node, None)
+        # next hops depend on the node's own cost-to-root and on those of its successors
+        affected = set(nodes)
+        for node in nodes:
+            affected.update(self.reversed_graph.get(node, []))
+        for node in affected:
+            if node in self.distances:
+                self.next_hops[node] = next_hop(self.graph, self.distances, node, self.eps)
+            else:
+                self.next_hops.pop(node, None)
+
+    def update(self, nodes):
+        # nodes whose outgoing edge costs changed
+        for node in nodes:
+            self.update_vertex(node)
+        self.pending.update(nodes)
+
+    def repair(self, start=None):
+        # nodes still queued have a cost-to-root above the start's, no route from start reaches them
+        changed = self.compute(start)
+        self.pending.update(changed)
+        self.refresh(self.pending)
+        self.pending = set()
+        return changed
+
+    def walk(self, start, finish):
+        self.repair(start)
+        return walk_tree(self.tree, start, finish)
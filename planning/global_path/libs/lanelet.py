@@ -1,4 +1,6 @@
 import json
+import numpy as np
+from scipy.spatial import cKDTree
 
 class LaneletMap:
     def __init__(self, map_path):
@@ -29,3 +31,81 @@ class TileMap:
 
                 self.tiles[(row, col)][id_]['waypoints'].append((x, y))
                 self.tiles[(row, col)][id_]['idx'].append(n)
+
+
+class WaypointIndex:
+    # every lanelet waypoint packed into one (N, 2) array, searched with a kd-tree
+    def __init__(self, lanelets, tile_size):
+        points, offsets = [], [0]
+        for data in lanelets.values():
+            points.extend(data['waypoints'])
+            offsets.append(len(points))
+        self.build(list(lanelets.keys()), np.array(points, dtype=np.float64).reshape(-1, 2), offsets, tile_size)
+
+    @classmethod
+    def from_arrays(cls, lanelet_ids, points, offsets, tile_size):
+        # points already packed lanelet after lanelet (e.g. a memory mapped map store), used without a copy
+        index = cls.__new__(cls)
+        index.build(lanelet_ids, points, offsets, tile_size)
+        return index
+
+    def build(self, lanelet_ids, points, offsets, tile_size):
+        self.tile_size = tile_size
+        self.lanelet_ids = lanelet_ids
+        offsets = np.asarray(offsets, dtype=np.int64)
+        counts = np.diff(offsets)
+
+        self.points = np.ascontiguousarray(points, dtype=np.float64)
+        self.lanelet_idx = np.repeat(np.arange(len(lanelet_ids), dtype=np.int32), counts)
+        self.waypoint_idx = (np.arange(len(self.points)) - np.repeat(offsets[:-1], counts)).astype(np.int32)
+        self.tiles = np.floor_divide(self.points, tile_size).astype(np.int64)
+        self.tree = cKDTree(self.points)
+
+    def lanelet_of(self, i):
+        return self.lanelet_ids[self.lanelet_idx[i]], int(self.waypoint_idx[i])
+
+    def match(self, pt, max_dist=np.inf, k=4):
+        # scalar fast path of match_many
+        dists, idx = self.tree.query(pt, k=min(k, len(self.points)), distance_upper_bound=np.nextafter(max_dist, np.inf))
+        dists, idx = np.atleast_1d(dists).tolist(), np.atleast_1d(idx).tolist()
+        if dists[0] == np.inf:
+            return None
+        best = min(i for d, i in zip(dists, idx) if d == dists[0])
+        q_tile = (int(pt[0] // self.tile_size), int(pt[1] // self.tile_size))
+        tile = self.tiles[best]
+        if abs(tile[0] - q_tile[0]) <= 1 and abs(tile[1] - q_tile[1]) <= 1:
+            return best
+        i = self.match_in_tiles(np.asarray(pt, dtype=np.float64), np.array(q_tile), max_dist)
+        return None if i < 0 else int(i)
+
+    def match_many(self, pts, max_dist=np.inf, k=4):
+        # nearest waypoint inside the 3x3 tile neighbourhood of each query (-1 if none),
+        # exact ties go to the lowest packed index like the tile dict scan did
+        pts = np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+        n = len(self.points)
+        k = min(k, n)
+        dists, idx = self.tree.query(pts, k=k, distance_upper_bound=np.nextafter(max_dist, np.inf))
+        dists = dists.reshape(len(pts), k)
+        idx = idx.reshape(len(pts), k)
+
+        best = np.where(dists == dists[:, :1], idx, n).min(axis=1)
+        found = np.isfinite(dists[:, 0])
+        q_tiles = np.floor_divide(pts, self.tile_size).astype(np.int64)
+        near = np.zeros(len(pts), dtype=bool)
+        near[found] = np.all(np.abs(self.tiles[best[found]] - q_tiles[found]) <= 1, axis=1)
+        result = np.where(found & near, best, -1)
+
+        for q in np.nonzero(found & ~near)[0]:
+            result[q] = self.match_in_tiles(pts[q], q_tiles[q], max_dist)
+        return result
+
+    def match_in_tiles(self, pt, q_tile, max_dist):
+        radius = min(max_dist, 2 * np.sqrt(2) * self.tile_size)
+        cand = np.array(self.tree.query_ball_point(pt, np.nextafter(radius, np.inf)), dtype=np.int64)
+        if len(cand) == 0:
+            return -1
+        cand = cand[np.all(np.abs(self.tiles[cand] - q_tile) <= 1, axis=1)]
+        if len(cand) == 0:
+            return -1
+        dists = np.hypot(self.points[cand, 0] - pt[0], self.points[cand, 1] - pt[1])
+        return cand[dists == dists.min()].min()
@@ -1,44 +1,70 @@
 import json
-import pickle
 import os
+import sys
 
 import global_path
 
+toppath = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))))
+sys.path.append(f'{toppath}/drive_message/libs')
+import map_cache
+
+# edge costs the goal trees were built on, trees saved with another cost model are rebuilt
+COST_MODEL = 'time'
+# trees store one next hop per node since format 2
+TREE_FORMAT = 2
+
+def build_graph(file_path, cut_dist):
+    lmap = global_path.libs.lanelet.LaneletMap(file_path)
+    return lmap, global_path.libs.micro_lanelet_graph.MicroLaneletGraph(lmap, cut_dist)
+
 class MAP:
     def __init__(self, map):
-        toppath = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))))
         file_path = f'{toppath}/map_lane/hd_map/maps/{map}.json'
-        pickle_file = f'{os.path.dirname(os.path.dirname(os.path.realpath(__file__)))}/pkls/{map}.pkl'
+        cache_dir = f'{toppath}/map_lane/hd_map/cache'
+        self.goal_tree_file = f'{cache_dir}/{map}.goal_trees.json'
         self.tile_size = 5
-        
-        if os.path.exists(pickle_file):
-            with open(pickle_file, 'rb') as file:
-                data = pickle.load(file)
-                self.base_lla = data['base_lla']
-                self.lmap = data['lmap']
-                self.graph = data['graph']
-                self.lanelets = data['lanelets']
-                self.tiles = data['tiles']
-        else:
-            with open(file_path, 'r') as file:
+        self.cut_dist = map_cache.CUT_DISTS.get(map, map_cache.DEFAULT_CUT_DIST)
+
+        self.store = map_cache.load(file_path, cache_dir, self.cut_dist, self.tile_size, build_graph)
+        self.key = self.store.key
+        self.base_lla = self.store.base_lla
+        # the store keeps edge lengths, routing uses the time to traverse them at the speed limit (m/s)
+        speeds = self.store.speed_limit[self.store.node_lanelet] / 3.6
+        self.node_speeds = dict(zip(self.store.nodes, speeds.tolist()))
+        self.graph = self.store.build_graph(self.store.graph_costs / speeds[self.store.edge_sources()])
+        self.lanelets = self.store.lanelets
+        self.reversed_graph = global_path.libs.graph_search.reverse_graph(self.graph)
+        self.goal_trees = self.load_goal_trees()
+
+        self.waypoint_index = global_path.libs.lanelet.WaypointIndex.from_arrays(
+            self.store.ids, self.store.waypoints, self.store.wp_offsets, self.tile_size)
+
+    def load_goal_trees(self):
+        # goal trees depend on the graph only, so they are kept as long as the map cache key matches
+        if not os.path.exists(self.goal_tree_file):
+            return {}
+        try:
+            with open(self.goal_tree_file, 'r') as file:
                 data = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        if data.get('key') != self.key or data.get('costs') != COST_MODEL or data.get('format') != TREE_FORMAT:
+            return {}
+        return data['goal_trees']
+
+    def build_goal_trees(self, goal_nodes):
+        updated = False
+        for g_node in goal_nodes:
+            if g_node is None or g_node in self.goal_trees:
+                continue
+            self.goal_trees[g_node] = global_path.libs.graph_search.shortest_path_tree(self.graph, self.reversed_graph, g_node)
+            updated = True
+        if updated:
+            self.save_goal_trees()
+        return self.goal_trees
 
-            self.base_lla = data['base_lla']
-            cut_dist = 45
-
-            self.lmap = global_path.libs.lanelet.LaneletMap(file_path)
-            tmap = global_path.libs.lanelet.TileMap(self.lmap.lanelets, self.tile_size)
-            mlg = global_path.libs.micro_lanelet_graph.MicroLaneletGraph(self.lmap, cut_dist)
-        
-            self.graph = mlg.graph
-            self.lanelets = mlg.lanelets
-            self.tiles = tmap.tiles
-            
-            with open(pickle_file, 'wb') as file:
-                pickle.dump({
-                    'base_lla': self.base_lla,
-                    'lmap': self.lmap,
-                    'graph': self.graph,
-                    'lanelets': self.lanelets,
-                    'tiles': self.tiles
-                }, file)
\ No newline at end of file
+    def save_goal_trees(self):
+        tmp_file = f'{self.goal_tree_file}.{os.getpid()}.tmp'
+        with open(tmp_file, 'w') as file:
+            json.dump({'key': self.key, 'costs': COST_MODEL, 'format': TREE_FORMAT, 'goal_trees': self.goal_trees}, file)
+        os.replace(tmp_file, self.goal_tree_file)
@@ -1,4 +1,8 @@
 import csv
+import queue
+import threading
+
+import rospy
 
 def to_csv(file_path, trajectory_info):
     with open(file_path, 'w', newline='') as file:
@@ -12,4 +16,38 @@ def to_txt(file, arr):
             file.write(f"{ar} ")
             if i+1 % 20 == 0 :
                 file.write("\n")
-                
\ No newline at end of file
+                
+class CsvWriter:
+    # writes trajectories on a daemon thread so that replanning does not wait for the disk
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def write(self, file_path, trajectory_info):
+        self.jobs.put((file_path, trajectory_info))
+
+    def run(self):
+        while True:
+            file_path, trajectory_info = self.jobs.get()
+            try:
+                to_csv(file_path, trajectory_info.tolist() if hasattr(trajectory_info, 'tolist') else trajectory_info)
+            except OSError as e:
+                rospy.logwarn(f'[CsvWriter] failed to write {file_path}: {e}')
+            finally:
+                self.jobs.task_done()
+
+    def flush(self):
+        self.jobs.join()
+
+
+writer = None
+writer_lock = threading.Lock()
+
+def shared_writer():
+    # one writer thread per process, planners rebuilt on reset keep using it
+    global writer
+    with writer_lock:
+        if writer is None:
+            writer = CsvWriter()
+        return writer
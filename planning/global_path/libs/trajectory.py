@@ -0,0 +1,126 @@
+import numpy as np
+
+# column layout of a global path sample (same order as the log csv)
+COLUMNS = ['x', 'y', 'w_right', 'w_left', 'x_normvec', 'y_normvec', 'alpha', 's', 'psi', 'kappa', 'vx', 'ax']
+X, Y, W_RIGHT, W_LEFT, X_NORMVEC, Y_NORMVEC, ALPHA, S, PSI, KAPPA, VX, AX = range(len(COLUMNS))
+# lanelet of every sample and its neighbours ('' for none), attached by the route builder
+LANE_DTYPE = np.dtype([('lanelet', 'U16'), ('left', 'U16'), ('right', 'U16'), ('lane_no', np.int64), ('bank', np.bool_)])
+
+
+class Trajectory:
+    # (N, 12) float array; slicing returns a view, not a copy.
+    # root is the trajectory a view was sliced from and offset its first row there,
+    # a copy (e.g. a shifted path) is a new root. lanes is an optional LANE_DTYPE row per sample
+    def __init__(self, data, root=None, offset=0, lanes=None):
+        self.data = np.asarray(data, dtype=np.float64).reshape(-1, len(COLUMNS))
+        self.root = self if root is None else root
+        self.offset = offset
+        self.lanes = lanes
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, _, step = key.indices(len(self.data))
+            lanes = None if self.lanes is None else self.lanes[key]
+            if step != 1:
+                return Trajectory(self.data[key], lanes=lanes)
+            return Trajectory(self.data[key], self.root, self.offset + start, lanes)
+        return self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def copy(self):
+        return Trajectory(self.data.copy(), lanes=None if self.lanes is None else self.lanes.copy())
+
+    def tolist(self):
+        return self.data.tolist()
+
+    @property
+    def xy(self):
+        return self.data[:, X:Y+1]
+
+    @property
+    def x(self):
+        return self.data[:, X]
+
+    @property
+    def y(self):
+        return self.data[:, Y]
+
+    @property
+    def w_right(self):
+        return self.data[:, W_RIGHT]
+
+    @property
+    def w_left(self):
+        return self.data[:, W_LEFT]
+
+    @property
+    def normvec(self):
+        return self.data[:, X_NORMVEC:Y_NORMVEC+1]
+
+    @property
+    def s(self):
+        return self.data[:, S]
+
+    @property
+    def psi(self):
+        return self.data[:, PSI]
+
+    @property
+    def kappa(self):
+        return self.data[:, KAPPA]
+
+    @property
+    def vx(self):
+        return self.data[:, VX]
+
+    @property
+    def ax(self):
+        return self.data[:, AX]
+
+
+def path_xy(path):
+    if isinstance(path, Trajectory):
+        return path.xy
+    return np.asarray(path, dtype=np.float64).reshape(len(path), -1)[:, :2]
+
+def distances_to(points, pos):
+    return np.sqrt((pos[0]-points[:, 0])**2 + (pos[1]-points[:, 1])**2)
+
+def first_local_min(dists, threshold):
+    # index a forward walk settles on once the distance grows threshold past the running minimum,
+    # None if the walk never turns back inside dists
+    cummin = np.minimum.accumulate(dists)
+    stop = np.nonzero(dists[1:] > cummin[:-1] + threshold)[0]
+    if len(stop) == 0:
+        return None
+    return int(np.argmin(dists[:stop[0]+1]))
+
+
+class PathTracker:
+    # remembers the last matched index and only searches a short window around it,
+    # falls back to a full search when the window does not contain a close enough match
+    def __init__(self, path, window=100, back=5, jump_threshold=10.0):
+        self.points = path_xy(path)
+        self.window = window
+        self.back = back
+        self.jump_threshold = jump_threshold
+        self.idx = None
+
+    def update(self, pos):
+        if len(self.points) == 0:
+            return None
+        if self.idx is not None:
+            s_idx = max(self.idx - self.back, 0)
+            e_idx = min(self.idx + self.window, len(self.points))
+            dists = distances_to(self.points[s_idx:e_idx], pos)
+            i = int(np.argmin(dists))
+            if dists[i] <= self.jump_threshold and (s_idx + i < e_idx - 1 or e_idx == len(self.points)):
+                self.idx = s_idx + i
+                return self.idx
+        self.idx = int(np.argmin(distances_to(self.points, pos)))
+        return self.idx
@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+import random
+
+import numpy as np
+
+toppath = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+sys.path.append(toppath)
+
+import global_path
+import planning_handler as ph
+from global_path.libs import curvature
+
+MAPS = ['KIAPI_Racing_Fast', 'Harbor', 'KIAPI_City']
+PATHS = 50
+WINDOW_SIZE = 15
+
+
+# previous per-point loop over the scalar calc_kappa, kept for comparison
+def scalar_R_list(points, base_offset=2, step_size=40):
+    Rs = []
+    numpoints = len(points)
+    last_R = 99999
+    last_offset = step_size * 2
+
+    for i in range(numpoints):
+        if i + base_offset < numpoints - last_offset:
+            epoints = points[i + base_offset]
+            npoints = [points[i + base_offset + step_size], points[i + base_offset + 2 * step_size]]
+            kappa = ph.calc_kappa(epoints, npoints)
+            R = abs(1 / kappa) if kappa != 0 else 99999
+            last_R = R
+            Rs.append(R)
+        else:
+            Rs.append(last_R)
+    return Rs
+
+def scalar_path_kappa(points, window_size):
+    kappas = []
+    for i, f in enumerate(points):
+        before_after_pts = [points[max(0, i-window_size)], points[min(len(points)-1, i+window_size)]]
+        kappas.append(global_path.libs.gp_utils.calc_kappa(f, before_after_pts))
+    return kappas
+
+def scalar_path_heading(points, window_size):
+    thetas = []
+    for i in range(len(points)):
+        before_after_pts = [points[max(0, i-window_size)], points[min(len(points)-1, i+window_size)]]
+        thetas.append(global_path.libs.gp_utils.calc_norm_vec(before_after_pts)[2])
+    return thetas
+
+def same(a, b):
+    # numpy's pow may differ from the C library one in the last bit
+    return np.allclose(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64), rtol=1e-12, atol=0)
+
+def sample_paths(lanelets, count):
+    paths = []
+    ids = sorted(lanelets)
+    while len(paths) < count:
+        waypoints = lanelets[random.choice(ids)]['waypoints']
+        if len(waypoints) < 10:
+            continue
+        path = [list(pt) for pt in waypoints]
+        # an axis aligned path hits the degenerate branch
+        if len(paths) % 5 == 0:
+            path = [[path[0][0], y] for x, y in path]
+        paths.append(path)
+    return paths
+
+def main():
+    random.seed(0)
+    for map_name in MAPS:
+        file_path = f'{os.path.dirname(toppath)}/map_lane/hd_map/maps/{map_name}.json'
+        lmap = global_path.libs.lanelet.LaneletMap(file_path)
+        paths = sample_paths(lmap.lanelets, PATHS)
+        num_points = sum(len(p) for p in paths)
+
+        results = {}
+        for name, func in [('scalar R', scalar_R_list), ('array R', curvature.radius_list),
+                           ('scalar kappa', lambda p: scalar_path_kappa(p, WINDOW_SIZE)),
+                           ('array kappa', lambda p: curvature.path_kappa(p, WINDOW_SIZE)),
+                           ('scalar psi', lambda p: scalar_path_heading(p, WINDOW_SIZE)),
+                           ('array psi', lambda p: curvature.path_heading(p, WINDOW_SIZE))]:
+            start_time = time.perf_counter()
+            results[name] = [func(p) for p in paths]
+            elapsed = time.perf_counter() - start_time
+            print(f'[{map_name}] {name:12s}: {elapsed/num_points*1e6:7.2f} us/pt')
+
+        same_R = sum(1 for a, b in zip(results['scalar R'], results['array R']) if same(a, b))
+        same_kappa = sum(1 for a, b in zip(results['scalar kappa'], results['array kappa']) if same(a, b))
+        same_psi = sum(1 for a, b in zip(results['scalar psi'], results['array psi']) if same(a, b))
+        print(f'  same R lists {same_R}/{PATHS}, same kappa lists {same_kappa}/{PATHS}, same psi lists {same_psi}/{PATHS}')
+
+if __name__ == '__main__':
+    main()
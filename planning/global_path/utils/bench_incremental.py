@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import random
+
+toppath = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+sys.path.append(toppath)
+
+import global_path
+from global_path.libs import graph_search
+
+MAPS = ['KIAPI_Racing_Fast', 'Harbor', 'KIAPI_City']
+GOALS = 5
+ROUNDS = 100
+OCCUPIED = 4
+
+
+def same_tree(a, b, eps=1e-6):
+    if a['distances'].keys() != b['distances'].keys():
+        return False
+    if any(abs(a['distances'][n] - b['distances'][n]) > eps for n in a['distances']):
+        return False
+    return all(a['next_hops'][n] == b['next_hops'][n] for n in a['distances'])
+
+def main():
+    random.seed(0)
+    for map_name in MAPS:
+        map = global_path.libs.load_map.MAP(map_name)
+        costs = {node: dict(neighbors) for node, neighbors in map.graph.items()}
+        nodes = sorted(costs)
+        goals = random.sample(nodes, GOALS)
+        trees = [graph_search.IncrementalTree(costs, map.reversed_graph, g) for g in goals]
+        same_init = sum(1 for g, t in zip(goals, trees) if same_tree(t.tree, graph_search.shortest_path_tree(costs, map.reversed_graph, g)))
+
+        full_t, incremental_t, same, expanded = 0.0, 0.0, 0, 0
+        occupied = []
+        for _ in range(ROUNDS):
+            # objects move on: some nodes are freed, others get slow traffic
+            freed = occupied[:OCCUPIED // 2]
+            occupied = occupied[OCCUPIED // 2:] + random.sample(nodes, OCCUPIED // 2)
+            changed = set(freed) | set(occupied)
+            for node in changed:
+                factor = random.uniform(2, 20) if node in occupied else 1.0
+                costs[node] = {to_id: cost * factor for to_id, cost in map.graph[node].items()}
+            starts = [random.choice(nodes) for _ in goals]
+
+            start_time = time.perf_counter()
+            routes = []
+            for tree, g, s in zip(trees, goals, starts):
+                tree.update(changed)
+                expanded += len(tree.repair(s))
+                routes.append(graph_search.walk_tree(tree.tree, s, g))
+            incremental_t += time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            fresh = [graph_search.walk_tree(graph_search.shortest_path_tree(costs, map.reversed_graph, g), s, g)
+                     for g, s in zip(goals, starts)]
+            full_t += time.perf_counter() - start_time
+            same += sum(1 for a, b in zip(routes, fresh) if (a is None and b is None) or
+                        (a is not None and b is not None and a[0] == b[0] and abs(a[1] - b[1]) < 1e-6))
+
+        for tree in trees:
+            tree.repair()
+        same_final = sum(1 for g, t in zip(goals, trees) if same_tree(t.tree, graph_search.shortest_path_tree(costs, map.reversed_graph, g)))
+
+        print(f'[{map_name}] nodes: {len(nodes)}, same initial trees {same_init}/{GOALS}, same final trees {same_final}/{GOALS}')
+        print(f'  full rebuild + walk : {full_t/ROUNDS/GOALS*1000:8.3f} ms/route')
+        print(f'  repair + walk       : {incremental_t/ROUNDS/GOALS*1000:8.3f} ms/route '
+              f'({expanded/ROUNDS/GOALS:.1f} nodes repaired, same route {same}/{ROUNDS*GOALS})')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+import random
+
+import numpy as np
+
+toppath = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+sys.path.append(toppath)
+
+import global_path
+
+MAPS = ['KIAPI_Racing_Fast', 'Harbor', 'KIAPI_City']
+TILE_SIZE = 5
+QUERIES = 2000
+
+
+# previous tile dict scan, kept for comparison (max_dist=2 is the map_lane variant)
+def tile_matching(tiles, t_pt, max_dist=float('inf')):
+    row = int(t_pt[0] // TILE_SIZE)
+    col = int(t_pt[1] // TILE_SIZE)
+
+    min_dist = float('inf')
+    l_id, l_idx = None, None
+
+    for i in range(-1, 2):
+        for j in range(-1, 2):
+            selected_tile = tiles.get((row+i, col+j))
+            if selected_tile is not None:
+                for id_, data in selected_tile.items():
+                    for idx, pt in enumerate(data['waypoints']):
+                        dist = np.sqrt((pt[0]-t_pt[0])**2+(pt[1]-t_pt[1])**2)
+                        if dist > max_dist:
+                            continue
+                        if dist < min_dist:
+                            min_dist = dist
+                            l_id = id_
+                            l_idx = data['idx'][idx]
+    if l_id is not None:
+        return (l_id, l_idx)
+    else:
+        return None
+
+def index_single(index, t_pt, max_dist=float('inf')):
+    i = index.match(t_pt, max_dist)
+    return index.lanelet_of(i) if i is not None else None
+
+def index_matching(index, t_pts, max_dist=float('inf')):
+    return [index.lanelet_of(i) if i >= 0 else None for i in index.match_many(t_pts, max_dist)]
+
+def main():
+    random.seed(0)
+    for map_name in MAPS:
+        file_path = f'{os.path.dirname(toppath)}/map_lane/hd_map/maps/{map_name}.json'
+        lmap = global_path.libs.lanelet.LaneletMap(file_path)
+
+        start_time = time.perf_counter()
+        tiles = global_path.libs.lanelet.TileMap(lmap.lanelets, TILE_SIZE).tiles
+        tile_build = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        index = global_path.libs.lanelet.WaypointIndex(lmap.lanelets, TILE_SIZE)
+        index_build = time.perf_counter() - start_time
+
+        queries = []
+        for _ in range(QUERIES):
+            x, y = index.points[random.randrange(len(index.points))]
+            queries.append((x + random.uniform(-6, 6), y + random.uniform(-6, 6)))
+
+        print(f'[{map_name}] waypoints: {len(index.points)}, build tile: {tile_build*1000:.1f} ms, index: {index_build*1000:.1f} ms')
+        for max_dist in [float('inf'), 2]:
+            start_time = time.perf_counter()
+            tile_r = [tile_matching(tiles, pt, max_dist) for pt in queries]
+            tile_t = (time.perf_counter() - start_time) / QUERIES
+
+            start_time = time.perf_counter()
+            single_r = [index_single(index, pt, max_dist) for pt in queries]
+            single_t = (time.perf_counter() - start_time) / QUERIES
+
+            start_time = time.perf_counter()
+            batch_r = index_matching(index, queries, max_dist)
+            batch_t = (time.perf_counter() - start_time) / QUERIES
+
+            same = sum(1 for a, b, c in zip(tile_r, single_r, batch_r) if a == b == c)
+            print(f'  max_dist {max_dist}: tile {tile_t*1e6:8.1f} us, index single {single_t*1e6:8.1f} us, '
+                  f'index batch {batch_t*1e6:6.2f} us/pt (same {same}/{QUERIES})')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+import random
+import heapq as hq
+
+toppath = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+sys.path.append(toppath)
+
+import global_path
+from global_path.libs import graph_search
+
+MAPS = ['KIAPI_Racing_Fast', 'Harbor', 'KIAPI_City']
+CUT_DIST = 45
+QUERIES = 200
+
+
+# previous implementation (full heap + linear scan/heapify per relaxation), kept for comparison
+def legacy_dijkstra(graph, start, finish):
+    distances = {}
+    previous = {}
+    nodes = []
+
+    for vertex in graph:
+        if vertex == start:
+            distances[vertex] = 0
+            hq.heappush(nodes, [distances[vertex], vertex])
+        else:
+            distances[vertex] = float('inf')
+            hq.heappush(nodes, [distances[vertex], vertex])
+        previous[vertex] = None
+
+    while nodes:
+        current = hq.heappop(nodes)[1]
+
+        if current == finish:
+            path = []
+            if previous[current] is not None:
+                while previous[current]:
+                    path.append(current)
+                    current = previous[current]
+                path.append(start)
+                path.reverse()
+                cost = distances[finish]
+                return (path, cost)
+
+            else:
+                return None
+
+        neighbors = graph[current]
+
+        for neighbor in neighbors:
+            if neighbor == start:
+                continue
+            bridge_cost = distances[current] + neighbors[neighbor]
+
+            if bridge_cost < distances[neighbor]:
+                distances[neighbor] = bridge_cost
+                previous[neighbor] = current
+
+                for node in nodes:
+                    if node[1] == neighbor:
+                        node[0] = bridge_cost
+                        break
+                hq.heapify(nodes)
+
+    return None
+
+def load_graph(map_name):
+    file_path = f'{os.path.dirname(toppath)}/map_lane/hd_map/maps/{map_name}.json'
+    lmap = global_path.libs.lanelet.LaneletMap(file_path)
+    mlg = global_path.libs.micro_lanelet_graph.MicroLaneletGraph(lmap, CUT_DIST)
+    return mlg.lanelets, mlg.graph
+
+def timeit(func, queries):
+    results = []
+    start_time = time.perf_counter()
+    for s, g in queries:
+        results.append(func(s, g))
+    return (time.perf_counter() - start_time) / len(queries), results
+
+def main():
+    random.seed(0)
+    for map_name in MAPS:
+        _, graph = load_graph(map_name)
+        nodes = sorted(graph)
+        queries = [tuple(random.sample(nodes, 2)) for _ in range(QUERIES)]
+
+        legacy_t, legacy_r = timeit(lambda s, g: legacy_dijkstra(graph, s, g), queries)
+        dijkstra_t, dijkstra_r = timeit(lambda s, g: graph_search.shortest_path(graph, s, g), queries)
+
+        reversed_graph = graph_search.reverse_graph(graph)
+        trees = {g: graph_search.shortest_path_tree(graph, reversed_graph, g) for g in set(g for _, g in queries)}
+        tree_t, tree_r = timeit(lambda s, g: graph_search.walk_tree(trees[g], s, g), queries)
+
+        same_seq = sum(1 for a, b in zip(legacy_r, dijkstra_r) if a == b)
+        same_tree = sum(1 for a, b in zip(legacy_r, tree_r) if (a is None and b is None) or (a is not None and b is not None and a[0] == b[0]))
+
+        print(f'[{map_name}] nodes: {len(graph)}, edges: {sum(len(v) for v in graph.values())}')
+        print(f'  legacy dijkstra : {legacy_t*1000:8.3f} ms/query')
+        print(f'  dijkstra        : {dijkstra_t*1000:8.3f} ms/query (same sequence {same_seq}/{QUERIES})')
+        print(f'  goal tree walk  : {tree_t*1000:8.3f} ms/query (same sequence {same_tree}/{QUERIES})')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import os
+import sys
+import time
+import copy
+import random
+
+toppath = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+sys.path.append(toppath)
+
+import global_path
+import global_path.libs.gp_utils as gput
+from global_path.libs import graph_search
+
+MAPS = ['KIAPI_Racing_Fast', 'Harbor', 'KIAPI_City']
+QUERIES = 200
+PATH_LEN = 800
+
+
+# previous list based route assembly, kept for comparison
+def legacy_straight_path(idnidx, path_len, stop_id, prior='Left'):
+    lanelets = gput.lanelets
+    s_n = idnidx[0]
+    s_i = idnidx[1]
+    wps = copy.deepcopy(lanelets[s_n]['waypoints'])
+    lls_len = len(wps)
+    ids = [s_n]*lls_len
+    vs = [lanelets[s_n]['speedLimit']]*lls_len
+    u_n = s_n
+    u_i = s_i+int(path_len)
+    e_i = u_i
+
+    while u_i >= lls_len:
+        _u_n = gput.get_possible_successor(u_n, prior)
+        if _u_n == stop_id:
+            u_i = lls_len-1
+            break
+        if _u_n == None:
+            e_i = len(wps)
+            break
+        u_n = _u_n
+        u_i -= lls_len
+        e_i += u_i
+        u_wp = lanelets[u_n]['waypoints']
+        lls_len = len(u_wp)
+        ids.extend([u_n]*lls_len)
+        vs.extend([lanelets[u_n]['speedLimit']]*lls_len)
+        wps += u_wp
+
+    return wps[s_i:e_i], [u_n, u_i], ids[s_i:e_i], vs[s_i:e_i]
+
+def legacy_node_to_waypoints(shortest_path):
+    lanelets = gput.lanelets
+    final_path, final_ids, final_vs = [], [], []
+    for id in shortest_path:
+        split_id = id.split('_')
+        if len(split_id) == 2:
+            _id = split_id[0]
+            s_idx, e_idx = lanelets[_id]['cut_idx'][int(split_id[1])]
+            alpha_path = lanelets[_id]['waypoints'][s_idx:e_idx]
+        else:
+            _id = id
+            alpha_path = lanelets[_id]['waypoints']
+        lls_len = len(alpha_path)
+        final_vs.extend([lanelets[_id]['speedLimit']]*lls_len)
+        final_ids.extend([_id]*lls_len)
+        final_path.extend(alpha_path)
+    return final_path, final_ids, final_vs
+
+def timeit(func, queries):
+    results = []
+    start_time = time.perf_counter()
+    for query in queries:
+        results.append(func(*query))
+    return (time.perf_counter() - start_time) / len(queries), results
+
+def main():
+    random.seed(0)
+    for map_name in MAPS:
+        map = global_path.libs.load_map.MAP(map_name)
+        gput.store = map.store
+        # the legacy functions run on the lanelet dicts parsed from the json, as before the store
+        file_path = f'{os.path.dirname(toppath)}/map_lane/hd_map/maps/{map_name}.json'
+        legacy_lanelets = global_path.libs.load_map.build_graph(file_path, map.cut_dist)[1].lanelets
+        gput.lanelets = map.lanelets
+        ids = sorted(map.lanelets)
+        nodes = sorted(map.graph)
+
+        starts = []
+        for _ in range(QUERIES):
+            id_ = random.choice(ids)
+            starts.append(((id_, random.randrange(gput.lanelet_size(id_))), PATH_LEN, '', random.choice(['Left', 'Right'])))
+        routes = []
+        while len(routes) < QUERIES:
+            result = graph_search.shortest_path(map.graph, *random.sample(nodes, 2))
+            if result is not None:
+                routes.append((result[0],))
+
+        gput.lanelets = legacy_lanelets
+        legacy_sp_t, legacy_sp_r = timeit(legacy_straight_path, starts)
+        legacy_nw_t, legacy_nw_r = timeit(legacy_node_to_waypoints, routes)
+        gput.lanelets = map.lanelets
+        span_sp_t, span_sp_r = timeit(lambda *q: gput.materialize_spans(gput.straight_spans(*q)[0]), starts)
+        _, list_sp_r = timeit(gput.get_straight_path, starts)
+        span_nw_t, span_nw_r = timeit(lambda route: gput.materialize_spans(gput.node_spans(route)), routes)
+        _, list_nw_r = timeit(lambda route: gput.node_to_waypoints(route, None, None), routes)
+
+        same_sp = sum(1 for a, b in zip(legacy_sp_r, list_sp_r) if a == b)
+        same_nw = sum(1 for a, b in zip(legacy_nw_r, list_nw_r) if a == b)
+        print(f'[{map_name}]')
+        print(f'  straight path legacy : {legacy_sp_t*1000:8.3f} ms/query')
+        print(f'  straight path spans  : {span_sp_t*1000:8.3f} ms/query (same {same_sp}/{QUERIES})')
+        print(f'  node path legacy     : {legacy_nw_t*1000:8.3f} ms/query')
+        print(f'  node path spans      : {span_nw_t*1000:8.3f} ms/query (same {same_nw}/{QUERIES})')
+
+if __name__ == '__main__':
+    main()
@@ -6,36 +6,44 @@ sys.path.append(toppath)
 
 import rospy
 import threading
+import numpy as np
 import signal
 import time
+from collections import namedtuple
 from datetime import datetime, timedelta
-import copy
 
 from ros_handler import ROSHandler
-from longitudinal.get_max_velocity import GetMaxVelocity
 from global_path.global_path_planner import GlobalPathPlanner
+from global_path.libs.trajectory import PathTracker
 import planning_handler as ph
+import scheduler
 
 LOCAL_PATH_LENGTH=130
 REAL_MAX_SPEED=115
 
+# what the executed thread uses from initd, replaced as a whole by initd and read once per cycle
+PlanningState = namedtuple('PlanningState', ['race_mode', 'global_path', 'spline_cache', 'path_tracker', 'max_vel'])
+
 def signal_handler(sig, frame):
     os._exit(0)
 
 class Planning():
-    def __init__(self):
-        self.RH = ROSHandler()
-        self.gmv = None
+    def __init__(self, ros_handler=None, prefetch=True, log_csv=True):
+        # a stand-in handler (see replay.py) runs the same logic without a ROS master
+        self.RH = ROSHandler() if ros_handler is None else ros_handler
         self.gpp = None
-        self.setting_values(rospy.get_param("/now_lap"))
+        self.prefetcher = None
+        self.prefetch = prefetch
+        self.log_csv = log_csv
+        self.timings = {}
+        self.setting_values(self.RH.get_param("/now_lap"))
 
     
     def setting_values(self, now_lap):
-        while self.RH.map_name is None or self.RH.local_pos is None:
-            pass
+        self.RH.wait_for(lambda: self.RH.map_name is not None and self.RH.local_pos is not None)
         
         self.shutdown_event = threading.Event()
-        self.gpp = GlobalPathPlanner(self.RH.map_name)
+        self.route_ready = threading.Event()
         
         self.race_mode = 'to_goal'
         self.prev_race_mode = self.race_mode
@@ -57,6 +65,7 @@ class Planning():
         self.system_warning = False
 
         self.start_pose_initialized = False
+        self.start_pending = False
         self.first_initialized = False
         self.prev_target_vel = 0
         self.first_lap = 0
@@ -64,21 +73,49 @@ class Planning():
         self.pit_stop_decel = 'OFF'
 
         self.local_action_set = []
+        self.frenet_objects = (None, [], [], [])
         self.prev_lap = now_lap
-        self.pit_points = [rospy.get_param("/pit_stop_zone1_coordinate"), rospy.get_param("/pit_stop_zone2_coordinate"),rospy.get_param("/pit_stop_zone3_coordinate")]
+        self.pit_points = [self.RH.get_param("/pit_stop_zone1_coordinate"), self.RH.get_param("/pit_stop_zone2_coordinate"),self.RH.get_param("/pit_stop_zone3_coordinate")]
         self.pit_point = self.pit_points[0]
-        self.selected_lane = rospy.get_param("/selected_lane")
-        self.goal_points = [ rospy.get_param("/lane1_goal_coordinate"), rospy.get_param("/lane2_goal_coordinate"), rospy.get_param("/lane3_goal_coordinate")]
+        self.selected_lane = self.RH.get_param("/selected_lane")
+        self.goal_points = [ self.RH.get_param("/lane1_goal_coordinate"), self.RH.get_param("/lane2_goal_coordinate"), self.RH.get_param("/lane3_goal_coordinate")]
         self.goal_point = self.goal_points[2]
+        self.bank_list = self.RH.get_param("/curve_list")
+        self.current_lane = None
+        self.gpp = GlobalPathPlanner(self.RH.map_name, log_csv=self.log_csv, bank_list=self.bank_list)
+        self.gpp.set_goal_trees(self.goal_points + self.pit_points)
+
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+            self.prefetcher = None
+        if self.prefetch:
+            goals = {('to_goal', n): (point, 'to_goal') for n, point in enumerate(self.goal_points)}
+            goals.update({('pit_stop', n): (point, 'pit_stop') for n, point in enumerate(self.pit_points)})
+            self.prefetcher = ph.RoutePrefetcher(self.gpp, lambda: self.RH.local_pos, goals, lambda: self.RH.object_list, self.prefetch_wanted)
+            self.prefetcher.start()
         
-        self.max_vel = float(rospy.get_param("/max_velocity"))/3.6
-        self.bank_list = rospy.get_param("/curve_list")
+        self.max_vel = float(self.RH.get_param("/max_velocity"))/3.6
+        self.pit_vel_cap = float('inf')
+
+        self.state = PlanningState(self.race_mode, None, None, None, self.max_vel)
+        self.cycle = self.state
+        self.route = None
    
     def get_kst(self):
         utc_now = datetime.utcnow()
         kst_now = utc_now + timedelta(hours=9)
         return kst_now.strftime('%Y-%m-%d %H:%M:%S')
         
+    def publish(self, **changes):
+        # only initd (and a reset) replaces the snapshot, executed never writes it
+        state = self.state._replace(**changes)
+        if state != self.state:
+            self.state = state
+
+    def capped_max_vel(self):
+        # max_vel with the pit lane cap executed sets, what the vehicle is actually allowed to drive
+        return min(self.max_vel, self.pit_vel_cap)
+
     def check_planning_state(self):
         planning_state = 'NONE'
         race_mode = self.race_mode
@@ -92,7 +129,7 @@ class Planning():
             if self.RH.lap_count % 2 == 0 and self.RH.lap_count != 0 and self.prev_lap != self.RH.lap_count:
                 vel_offset = 5/3.6 if self.RH.lap_count <= 6 else 7/3.6
                 self.max_vel = min(self.max_vel + vel_offset, REAL_MAX_SPEED/3.6)
-            self.selected_lane = ph.get_selected_lane(self.max_vel, self.RH.current_lane_number)  
+            self.selected_lane = ph.get_selected_lane(self.capped_max_vel(), self.RH.current_lane_number)
             self.prev_lap = self.RH.lap_count
             if self.prev_race_mode in ['slow_on', 'slow_off', 'stop']:
                 race_mode = self.prev_race_mode
@@ -119,7 +156,7 @@ class Planning():
                 self.diffrent_lane_cnt = 0
                 self.start_pose_initialized = False
                 #TODO: Pre-2 off 
-                self.selected_lane = ph.get_selected_lane(self.max_vel, self.RH.current_lane_number)
+                self.selected_lane = ph.get_selected_lane(self.capped_max_vel(), self.RH.current_lane_number)
                 if self.race_mode == 'slow_on' and self.selected_lane == 1:
                     self.selected_lane = 2
                 self.prev_lane_number = self.RH.current_lane_number   
@@ -139,55 +176,75 @@ class Planning():
         
     def set_start_pos(self, race_mode):
         if race_mode == 'pit_stop':
-            global_path = copy.deepcopy(self.pit_stop_path)
+            global_path = self.pit_stop_path
         else:
             race_mode = 'to_goal'
-            global_path = copy.deepcopy(self.to_goal_path)
+            global_path = self.to_goal_path
         
         if global_path is not None:
-            self.gmv = GetMaxVelocity(self.RH, race_mode)
+            spline_cache = ph.SplineCache()
+            spline_cache.set_path(global_path)
+            self.publish(race_mode=self.race_mode, global_path=global_path, spline_cache=spline_cache,
+                         path_tracker=PathTracker(global_path), max_vel=self.max_vel)
             self.start_pose_initialized = True
             self.first_initialized = True
-            self.global_path = global_path
-            g_path = [(float(point[0]), float(point[1])) for point in global_path]
-            self.RH.publish_global_path(g_path)
-            self.gpp.global_path = g_path
+            self.route_ready.set()
+            self.RH.publish_global_path(global_path.xy)
     
+    def pit_point_index(self):
+        return 0 if self.RH.current_lane_number <= 2 else 2
+
     def set_pit_point(self):
-        if self.RH.current_lane_number <= 2:
-            self.pit_point = self.pit_points[0]
-        else:
-            self.pit_point = self.pit_points[2]
+        self.pit_point = self.pit_points[self.pit_point_index()]
+
+    def prefetch_wanted(self, key):
+        # a pit stop route is only needed while a pit stop can still be signalled, and only to the
+        # pit point set_pit_point would pick from the current lane
+        name, n = key
+        if name == 'pit_stop':
+            return self.race_mode != 'pit_stop' and n == self.pit_point_index()
+        return True
+
+    def get_route(self, key, point, name):
+        # prefetched route if it is still fresh, planned here otherwise
+        gp = self.prefetcher.get(key, self.RH.local_pos) if self.prefetcher is not None else None
+        if gp is not None:
+            self.gpp.to_csv(name, gp.data)
+            return True, gp, 'prefetched'
+        gpp_result, gp = self.gpp.get_shortest_path(self.RH.local_pos, point, name)
+        return gpp_result, gp, 'planned'
 
     def planning_pit_stop(self):
         start_time = time.time()
         self.set_pit_point()
-        gpp_result, gp = self.gpp.get_shortest_path(self.RH.local_pos, self.pit_point, 'pit_stop')
+        n = self.pit_points.index(self.pit_point)
+        gpp_result, gp, source = self.get_route(('pit_stop', n), self.pit_point, 'pit_stop')
         if gpp_result:
             self.pit_stop_path = gp
             self.start_pose_initialized = False
-            rospy.loginfo(f'[{self.get_kst()}] pit_stop set {round(time.time()-start_time, 2)} sec')
+            rospy.loginfo(f'[{self.get_kst()}] pit_stop set {round(time.time()-start_time, 2)} sec ({source})')
     
     def planning_to_goal(self):
         start_time = time.time()
         point = self.goal_points[self.selected_lane-1]
-        gpp_result, gp = self.gpp.get_shortest_path(self.RH.local_pos, point, 'to_goal')
+        gpp_result, gp, source = self.get_route(('to_goal', self.selected_lane-1), point, 'to_goal')
         if gpp_result:
             self.to_goal_path = gp
             self.start_pose_initialized = False
-            rospy.loginfo(f'[{self.get_kst()}] to_goal set {round(time.time()-start_time, 2)} sec')
+            rospy.loginfo(f'[{self.get_kst()}] to_goal set {round(time.time()-start_time, 2)} sec ({source})')
         
     def check_bank(self):
-        if self.RH.current_lane_id in self.bank_list:
-            return True
-        else:
-            return False
+        # bank flag of the path sample at the ego position, the lane id list only before a path exists
+        if self.current_lane is not None:
+            return bool(self.current_lane['bank'])
+        return self.RH.current_lane_id in self.bank_list
     
     def path_update(self, trim_global_path):
+        self.current_lane = trim_global_path.lanes[0] if len(trim_global_path) > 0 and trim_global_path.lanes is not None else None
         if len(trim_global_path) < 5:
             return trim_global_path
         
-        final_global_path = trim_global_path.copy()  # Make a copy of the global path to modify
+        final_global_path = trim_global_path  # copied only when a branch below shifts the path
         
         object_list = self.RH.object_list  # List of objects
         
@@ -200,8 +257,11 @@ class Planning():
         lat_avoidance_gap = 3.7 if self.check_bank() else 3.5
         target_d = 3 if self.check_bank() else 2.7
 
-        for obj in object_list:
-            s, d = ph.object2frenet(trim_global_path, [float(obj['X']), float(obj['Y'])])
+        frenet = ph.FrenetFrame(trim_global_path)
+        obj_s, obj_d = frenet.project([[float(obj['X']), float(obj['Y'])] for obj in object_list])
+        self.frenet_objects = (trim_global_path, object_list, obj_s, obj_d)
+
+        for obj, s, d in zip(object_list, obj_s, obj_d):
             l_th, r_th = ph.get_lr_threshold(trim_global_path, s)  
             if  r_th < d <l_th and -50 < s:
                 obj['s'] = s
@@ -237,58 +297,47 @@ class Planning():
                             self.lc_state_list = self.prev_lc_state_list
                 break
 
-        if self.acc_cnt >= 70 and self.race_mode != 'pit_stop' and not overtaking_required and self.lc_state_list is not None:
+        race_mode = self.cycle.race_mode
+        if self.acc_cnt >= 70 and race_mode != 'pit_stop' and not overtaking_required and self.lc_state_list is not None:
             overtaking_required = True
             self.acc_reset = True
         
-        path_updated = False
-        avoid_on = False
-        if self.race_mode not in ['pit_stop', 'slow_on'] and overtaking_required and self.lc_state_list is not None:
-            for i, lc_state in enumerate(self.lc_state_list):
-                if not path_updated:
-                    for j, point in enumerate(trim_global_path):
-                        x, y = point[0], point[1]
-                        r_width, l_width = point[2], point[3]
-                        x_normvec, y_normvec = point[4], point[5]
-                        for obj in front_object:
-                            overtakng = ph.calc_overtaking_by_ttc(obj['dist'], obj['v'], self.RH.current_velocity)
-                            if overtakng or self.acc_reset:
-                                if self.RH.current_lane_id in ['28', '29', '30', '2', '5', '4', '38', '37', '36']:
-                                    around_detected = ph.check_around2(obj, check_object, lc_state)
-                                else:
-                                    around_detected = ph.check_around(obj, check_object, lc_state)
-                                bsd_detected = ph.check_bsd(self.RH.left_bsd_detect, self.RH.right_bsd_detect, lc_state)
-                                lidar_bsd_detected = ph.check_bsd(self.RH.left_lidar_bsd_detect, self.RH.right_lidar_bsd_detect, lc_state)
-                                lat_avoidance_overed, avoidance_gap = ph.check_avoidance_gap_over(lc_state, l_width, r_width, lat_avoidance_gap, obj['d'])
-                                if not around_detected and not bsd_detected and not lidar_bsd_detected and not lat_avoidance_overed:
-                                    path_updated = True
-                                    obj_x, obj_y = float(obj['X']), float(obj['Y'])
-                                    obj_radius = long_avoidance_gap - (obj['v'] / 5) 
-                                    distance_to_obj = ph.distance(x, y, obj_x, obj_y)
-                                    self.lane_change_state = lc_state
-                                    if distance_to_obj <= obj_radius or avoid_on:
-                                        avoid_on = True
-                                        shift_value = avoidance_gap if lc_state == 'left' else -avoidance_gap
-                                        generated_point = (x + (-1 * x_normvec) * shift_value, y + (-1 * y_normvec) * shift_value)
-                                        final_global_path[j][0] = generated_point[0]
-                                        final_global_path[j][1] = generated_point[1]
-                                        
-
-        elif self.race_mode == 'slow_on' and self.RH.current_lane_id in ['17', '14', '1', '25', '26', '56', '42']:
+        if race_mode not in ['pit_stop', 'slow_on'] and overtaking_required and self.lc_state_list is not None:
+            # everything except the lane width is independent of the path point, so it is decided once per object
+            if self.RH.current_lane_id in ['28', '29', '30', '2', '5', '4', '38', '37', '36']:
+                check_around = ph.check_around2
+            else:
+                check_around = ph.check_around
+            obj_xy = np.array([[float(obj['X']), float(obj['Y'])] for obj in front_object]).reshape(-1, 2)
+            obj_radius = np.array([long_avoidance_gap - (obj['v'] / 5) for obj in front_object])
+            for lc_state in self.lc_state_list:
+                bsd_detected = ph.check_bsd(self.RH.left_bsd_detect, self.RH.right_bsd_detect, lc_state)
+                lidar_bsd_detected = ph.check_bsd(self.RH.left_lidar_bsd_detect, self.RH.right_lidar_bsd_detect, lc_state)
+                obj_passable = []
+                obj_gap = []
+                for obj in front_object:
+                    overtakng = ph.calc_overtaking_by_ttc(obj['dist'], obj['v'], self.RH.current_velocity)
+                    around_detected = check_around(obj, check_object, lc_state)
+                    obj_passable.append((overtakng or self.acc_reset) and not around_detected and not bsd_detected and not lidar_bsd_detected)
+                    obj_gap.append(ph.get_avoidance_gap(lc_state, lat_avoidance_gap, obj['d']))
+
+                path_updated, shift, shifted = ph.get_avoidance_shift(trim_global_path, obj_xy, obj_radius, np.array(obj_gap), np.array(obj_passable, dtype=bool), lc_state)
+                if path_updated:
+                    self.lane_change_state = lc_state
+                    if shifted.any():
+                        final_global_path = ph.shift_path(trim_global_path, shift, shifted)
+                    break
+
+        elif race_mode == 'slow_on' and self.RH.current_lane_id in ['17', '14', '1', '25', '26', '56', '42']:
             bsd_detected = ph.check_bsd(self.RH.left_bsd_detect, self.RH.right_bsd_detect, 'right')
             lidar_bsd_detected = ph.check_bsd(self.RH.left_lidar_bsd_detect, self.RH.right_lidar_bsd_detect, 'right')
             if not bsd_detected and not lidar_bsd_detected and len(right_object) == 0:
-                for i, point in enumerate(trim_global_path):
-                    shift_value = -4
-                    self.lane_change_state = 'right'
-                    if i > 5:
-                        generated_path = (point[0] + (-1 * point[4]) * shift_value, point[1] + (-1 * point[5]) * shift_value)
-                        final_global_path[i][0] = generated_path[0]
-                        final_global_path[i][1] = generated_path[1]
-                            
+                self.lane_change_state = 'right'
+                shifted = np.arange(len(trim_global_path)) > 5
+                final_global_path = ph.shift_path(trim_global_path, np.full(len(trim_global_path), -4.0), shifted)
 
         else: #if BSD detected in following / straight mode, we have to change lane & update global path 
-            change_point_caution = self.gpp.get_change_point_caution(trim_global_path, self.RH.local_pos, self.RH.current_velocity)
+            change_point_caution = self.gpp.get_change_point_caution(trim_global_path, self.RH.current_velocity)
             if change_point_caution is not None :
                 change_caution, lc_state, change_idx = change_point_caution
                 bsd_detected = ph.check_bsd(self.RH.left_bsd_detect, self.RH.right_bsd_detect, lc_state)
@@ -306,12 +355,16 @@ class Planning():
     ):
         if len(interped_vel) > 3:
             if self.lane_change_state == 'follow':
-                object_list = self.RH.object_list 
                 acc_object_d_v = []
                 target_d = 3 if self.check_bank() else 2.7
-                    
-                for obj in object_list:
-                    s, d = ph.object2frenet(updated_path, [float(obj['X']), float(obj['Y'])])
+
+                # reuse the projection from path_update unless the path was shifted since
+                frenet_path, object_list, obj_s, obj_d = self.frenet_objects
+                if frenet_path is not updated_path:
+                    object_list = self.RH.object_list
+                    obj_s, obj_d = ph.FrenetFrame(updated_path).project([[float(obj['X']), float(obj['Y'])] for obj in object_list])
+
+                for obj, s, d in zip(object_list, obj_s, obj_d):
                     if s> 0 and -target_d < d < target_d:
                         acc_object_d_v.append([float(obj['dist']), float(obj['v'])])
                 min_s = 200
@@ -355,6 +408,7 @@ class Planning():
     def calculate_road_max_vel(
         self, 
         acc_vel, 
+        local_pos,
         slow_vel=9.8/3.6,                      # 기본값 10/3.6 (약 2.78 m/s)
         slow_mode_threshold=0.1,              # 기본값 0.1
         interval_divisor_base=4.6,              # 기본값 5
@@ -363,13 +417,14 @@ class Planning():
         # 기본 조건: set_go가 False일 경우
         if not self.RH.set_go:
             return -1
+        race_mode = self.cycle.race_mode
         # 'stop' 모드 처리
-        if self.race_mode == 'stop' :
+        if race_mode == 'stop' :
             if not self.check_bank():
                 return -1
 
         # 'slow_on' 모드 처리
-        elif self.race_mode == 'slow_on':
+        elif race_mode == 'slow_on':
             if not self.check_bank():
                 road_max_vel = slow_vel
                 if self.RH.current_velocity <= road_max_vel + slow_mode_threshold:
@@ -379,11 +434,12 @@ class Planning():
                 return slow_vel
 
         # 'pit_stop' 모드 처리
-        elif self.race_mode == 'pit_stop':
-            if self.gpp.get_pitstop_pass_id(self.RH.local_pos):
-                self.max_vel = 60/3.6 if self.max_vel > 60/3.6 else self.max_vel
-            if self.gpp.get_remain_distance(self.RH.local_pos) < LOCAL_PATH_LENGTH:
-                remain_dist = ph.distance(self.RH.local_pos[0], self.RH.local_pos[1], self.pit_point[0], self.pit_point[1])
+        elif race_mode == 'pit_stop':
+            if self.gpp.get_pitstop_pass_id(local_pos):
+                self.pit_vel_cap = 60/3.6
+            path_tracker = self.cycle.path_tracker
+            if len(path_tracker.points) - path_tracker.update(local_pos) < LOCAL_PATH_LENGTH:
+                remain_dist = ph.distance(local_pos[0], local_pos[1], self.pit_point[0], self.pit_point[1])
                 if self.pit_stop_decel == 'OFF' and ph.get_stop_distance(self.RH.current_velocity) > remain_dist:
                     self.pit_stop_decel = 'ON'
                 if self.pit_stop_decel == 'ON':
@@ -406,53 +462,91 @@ class Planning():
         return acc_vel
 
     
+    def init_step(self):
+        # one initd iteration, after an INIT the start stays pending until the new route could be set
+        if not self.start_pending:
+            planning_state, self.race_mode = self.check_planning_state()
+            if planning_state != 'INIT':
+                self.publish(race_mode=self.race_mode, max_vel=self.max_vel)
+                return
+            if self.race_mode == 'pit_stop':
+                self.planning_pit_stop()
+            else:
+                self.planning_to_goal()
+        if self.RH.local_pos is not None:
+            self.set_start_pos(self.race_mode)
+        self.start_pending = not self.start_pose_initialized
+
+    def step(self):
+        # one executed cycle on the latest snapshot, self.timings holds its stage times
+        timer = scheduler.StageTimer()
+        # one consistent snapshot per cycle, the progress along its route is kept here
+        self.cycle = state = self.state
+        # one pose per cycle, the path is trimmed from the pose it is stamped with even if a newer
+        # /VehicleState lands in between
+        origin = self.RH.local_pose
+        local_pos = (origin[1], origin[2]) if origin is not None else self.RH.local_pos
+        if state.global_path is not self.route:
+            self.route = state.global_path
+            self.global_path = state.global_path
+
+        trimmed_path, self.global_path = ph.trim_and_update_global_path(self.global_path,local_pos,LOCAL_PATH_LENGTH)
+        timer.lap('trim')
+        updated_path = self.path_update(trimmed_path) 
+        timer.lap('path_update')
+        interped_path, R_list, interped_vel = state.spline_cache.interpolate(updated_path, min_length=int(LOCAL_PATH_LENGTH/2))
+        timer.lap('interpolate')
+        
+        acc_vel = self.calculate_acc_vel(updated_path, interped_vel)
+
+        road_max_vel = self.calculate_road_max_vel(acc_vel, local_pos)     
+                        
+        if self.RH.lap_count == 0: # TODO: 0lap limit velocity
+            limit_vel = 29/3.6  
+        else:
+            limit_vel = min(state.max_vel, self.pit_vel_cap)
+        target_velocity = min(limit_vel, road_max_vel)
+
+        if state.race_mode == 'pit_stop' and len(interped_path) < 10:
+            target_velocity = -1
+        timer.lap('velocity')
+        
+        self.prev_target_vel = target_velocity
+        self.RH.publish2(interped_path, R_list, interped_vel, target_velocity, state.race_mode, self.lane_change_state, origin)
+        timer.lap('publish')
+        self.timings = timer.laps
+
+    def reset(self):
+        rospy.loginfo("[Planning] Current signal is 5, resetting to initial state.")
+        self.pit_vel_cap = float('inf')
+        self.setting_values(self.prev_lap)  # 초기화
+        self.RH.set_values()
+
     def initd(self):
         rate = rospy.Rate(20)
         while not rospy.is_shutdown() and not self.shutdown_event.is_set():
-            planning_state, self.race_mode = self.check_planning_state()
-            if planning_state == 'INIT':
-                if self.race_mode == 'pit_stop':
-                    self.planning_pit_stop()
-                else:
-                    self.planning_to_goal()
-                while not self.start_pose_initialized:            
-                    if self.RH.local_pos is not None:
-                        self.set_start_pos(self.race_mode)
-                    rate.sleep()
+            self.init_step()
             rate.sleep()
 
     def executed(self):
-        rate = rospy.Rate(5)
+        # the rate cap stays at 5 Hz unless /planning_min_period says otherwise, the pose comes in faster
+        min_period = float(self.RH.get_param("/planning_min_period", 0.2))
+        coalesce = float(self.RH.get_param("/planning_coalesce", 0.02))
+        cycle_scheduler = scheduler.PlanningScheduler(self.RH, coalesce=coalesce, min_period=min_period, idle_timeout=max(0.5, 2*min_period))
         while not rospy.is_shutdown() and not self.shutdown_event.is_set():
+            if not self.route_ready.wait(0.2):
+                continue
             while self.first_initialized:
+                trigger = cycle_scheduler.wait(self.shutdown_event)
+                if self.shutdown_event.is_set():
+                    break
 
                 if self.RH.current_signal == 5:
-                    rospy.loginfo("[Planning] Current signal is 5, resetting to initial state.")
-                    self.setting_values(self.prev_lap)  # 초기화
-                    self.RH.set_values()
+                    self.reset()
                     break
                 
-                trimmed_path, self.global_path = ph.trim_and_update_global_path(self.global_path,self.RH.local_pos,LOCAL_PATH_LENGTH)
-                updated_path = self.path_update(trimmed_path) 
-                interped_path, R_list, interped_vel = ph.interpolate_path(updated_path, min_length=int(LOCAL_PATH_LENGTH/2))
-                
-                acc_vel = self.calculate_acc_vel(updated_path, interped_vel)
-
-                road_max_vel = self.calculate_road_max_vel(acc_vel)     
-                                
-                if self.RH.lap_count == 0: # TODO: 0lap limit velocity
-                    limit_vel = 29/3.6  
-                else:
-                    limit_vel = self.max_vel
-                target_velocity = min(limit_vel, road_max_vel)
-
-                if self.race_mode == 'pit_stop' and len(interped_path) < 10:
-                    target_velocity = -1
-                
-                self.prev_target_vel = target_velocity
-                self.RH.publish2(interped_path, R_list, interped_vel, target_velocity, self.race_mode, self.lane_change_state)
-
-                rate.sleep()            
+                self.step()
+                self.RH.publish_cycle_latency(time.time() - trigger)
 
 def main():
     signal.signal(signal.SIGINT, signal_handler)
@@ -471,6 +565,8 @@ def main():
 
     except KeyboardInterrupt:
         planning.shutdown_event.set()
+        if planning.prefetcher is not None:
+            planning.prefetcher.stop()
         thread1.join()
         thread2.join()
     
@@ -1,32 +1,32 @@
 import numpy as np
 import math
-import copy
+import time
+import threading
 
 from scipy.interpolate import splprep, splev, interp1d
 
+from global_path.libs.trajectory import path_xy, distances_to, first_local_min
+from global_path.libs.curvature import radius_list
+
 
 def distance(x1, y1, x2, y2):
     return math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
 
-def find_closest_index(global_path, local_pos, threshold=20):
-    min_dist = float('inf')
-    closest_index = None
-    decreasing = True
-
-    for i, point in enumerate(global_path):
-        path_x = float(point[0])
-        path_y = float(point[1])
-        dist = distance(path_x, path_y, local_pos[0], local_pos[1])
+def find_closest_index(global_path, local_pos, threshold=20, window=200):
+    # walks forward from the start of the path (the previous match once the path is trimmed),
+    # only the first window points are checked unless the walk has not turned back by then
+    points = path_xy(global_path)
+    if len(points) == 0:
+        return None
 
-        if dist < min_dist:
-            min_dist = dist
-            closest_index = i
-            decreasing = True
-        elif decreasing and dist > min_dist + threshold:
-            decreasing = False
-            break
+    if window is not None and window < len(points):
+        closest_index = first_local_min(distances_to(points[:window], local_pos), threshold)
+        if closest_index is not None:
+            return closest_index
 
-    return closest_index
+    dists = distances_to(points, local_pos)
+    closest_index = first_local_min(dists, threshold)
+    return closest_index if closest_index is not None else int(np.argmin(dists))
 
 
 def generate_points(x_norm, y_norm, l_width):
@@ -43,42 +43,49 @@ def find_minimum_point(x_norm, y_norm, l_width):
     return min_point
 
 def trim_and_update_global_path(global_path, local_pos, local_path_length):
+    # both are views on the same trajectory, nothing is copied
     now_idx = max(find_closest_index(global_path, local_pos), 0)
     end_idx = min(now_idx + local_path_length, len(global_path))
-    copy_g_path = copy.deepcopy(global_path)
-    trim_global_path = copy_g_path[now_idx:end_idx]
+    trim_global_path = global_path[now_idx:end_idx]
     updated_global_path = global_path[now_idx:]
     
     return trim_global_path, updated_global_path
 
-def object2frenet(trim_path, obs_pose):
+class FrenetFrame:
+    # built once per planning cycle, projects any number of objects in one call
+    def __init__(self, path):
+        self.path = path
+        self.centerline = path_xy(path)
 
-    centerline = np.array([(point[0], point[1]) for point in trim_path])
-    point = np.array(obs_pose)
+        tangents = np.gradient(self.centerline, axis=0)
+        self.tangents = tangents / np.linalg.norm(tangents, axis=1)[:, np.newaxis]
+        self.normals = np.column_stack([-self.tangents[:, 1], self.tangents[:, 0]])
 
-    tangents = np.gradient(centerline, axis=0)
-    tangents = tangents / np.linalg.norm(tangents, axis=1)[:, np.newaxis]
-    
-    normals = np.column_stack([-tangents[:, 1], tangents[:, 0]])
-    
-    distances = np.linalg.norm(centerline - point, axis=1)
-    
-    closest_index = np.argmin(distances)
-    closest_point = centerline[closest_index]
-    tangent = tangents[closest_index]
-    normal = normals[closest_index]
-    
-    vector_to_point = point - closest_point
-    d = np.dot(vector_to_point, normal)
+        # 경로 시작부터 각 점까지의 누적 거리
+        seg_lengths = np.linalg.norm(np.diff(self.centerline, axis=0), axis=1)
+        self.s = np.concatenate(([0.0], np.cumsum(seg_lengths)))
+
+    def project(self, points):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if len(points) == 0:
+            return np.zeros(0), np.zeros(0)
+
+        distances = np.linalg.norm(self.centerline[np.newaxis, :, :] - points[:, np.newaxis, :], axis=2)
+        closest_index = np.argmin(distances, axis=1)
 
-    # 경로 상의 거리를 계산 (경로 시작부터 closest_index까지의 거리)
-    s = np.sum(np.linalg.norm(np.diff(centerline[:closest_index + 1], axis=0), axis=1))
+        vector_to_point = points - self.centerline[closest_index]
+        d = np.sum(vector_to_point * self.normals[closest_index], axis=1)
+        s = self.s[closest_index]
 
-    vector_from_start = point - centerline[0]  
-    if np.dot(tangents[0], vector_from_start) < 0:  
-        s = -np.linalg.norm(vector_from_start)  
+        vector_from_start = points - self.centerline[0]
+        behind = vector_from_start @ self.tangents[0] < 0
+        s = np.where(behind, -np.linalg.norm(vector_from_start, axis=1), s)
 
-    return s, d
+        return s, d
+
+def object2frenet(trim_path, obs_pose):
+    s, d = FrenetFrame(trim_path).project([obs_pose])
+    return s[0], d[0]
 
 
 def calc_kappa(epoints, npoints):
@@ -112,50 +119,15 @@ def calculate_R_first_index(points):
     return abs(R)
 
 def calculate_R_list(points, base_offset=2, step_size=40):
-    Rs = []
-    numpoints = len(points)
-    last_R = 99999
-    last_offset = step_size * 2
-
-    for i in range(numpoints):
-        if i + base_offset < numpoints - last_offset:
-            epoints = points[i + base_offset]
-            npoints = [points[i + base_offset + step_size], points[i + base_offset + 2 * step_size]]
-            kappa = calc_kappa(epoints, npoints)
-            R = abs(1 / kappa) if kappa != 0 else 99999
-            last_R = R
-            Rs.append(R)
-        else:
-            Rs.append(last_R)
-    return Rs
+    return radius_list(points, base_offset, step_size).tolist()
 
 def calculate_R_list2(array, base_offset=2, step_size=40):
-    Rs = []
-    numpoints = len(array)
-    last_R = 99999
-    last_offset = step_size * 2
-
-    # array는 shape이 [n, 2]로 x 좌표는 array[:, 0], y 좌표는 array[:, 1]에 들어가 있다고 가정
-    x_points = array[:, 0]
-    y_points = array[:, 1]
-
-    for i in range(numpoints):
-        if i + base_offset < numpoints - last_offset:
-            epoints = [x_points[i + base_offset], y_points[i + base_offset]]
-            npoints = [[x_points[i + base_offset + step_size], y_points[i + base_offset + step_size]],
-                       [x_points[i + base_offset + 2 * step_size], y_points[i + base_offset + 2 * step_size]]]
-            kappa = calc_kappa(epoints, npoints)
-            R = abs(1 / kappa) if kappa != 0 else 99999
-            last_R = R
-            Rs.append(R)
-        else:
-            Rs.append(last_R)
-    return Rs
+    return radius_list(array, base_offset, step_size).tolist()
 
 #best
 def interpolate_path(final_global_path, min_length=100, sample_rate=4, smoothing_factor=50, interp_points=4):
-    local_path = np.array([(point[0], point[1]) for point in final_global_path])
-    local_vel = [point[10] for point in final_global_path]
+    local_path = final_global_path.xy
+    local_vel = final_global_path.vx.tolist()
 
     if len(local_path) > min_length:
         sampled_indices = np.arange(0, len(local_path), sample_rate)
@@ -177,6 +149,101 @@ def interpolate_path(final_global_path, min_length=100, sample_rate=4, smoothing
 
     return path_interp_list, R_list, vel_interp
 
+class SplineCache:
+    # the global path is already smoothed once by GlobalPathPlanner.interpolate_path, so windows of it
+    # that path_update left untouched are served from lists built once per path revision (root trajectory).
+    # only shifted windows (copies, i.e. other revisions) are re-fitted with interpolate_path
+    def __init__(self, base_offset=2, step_size=40):
+        self.base_offset = base_offset
+        self.step_size = step_size
+        self.set_path(None)
+
+    def set_path(self, global_path):
+        self.root = None if global_path is None else global_path.root
+        if self.root is None:
+            self.path_list, self.vel_list, self.R_full = [], [], []
+            return
+        self.path_list = self.root.xy.tolist()
+        self.vel_list = self.root.vx.tolist()
+        self.R_full = radius_list(self.root.xy, self.base_offset, self.step_size).tolist()
+
+    def interpolate(self, path, min_length=100):
+        if self.root is None or path.root is not self.root:
+            return interpolate_path(path, min_length=min_length)
+
+        s_idx, e_idx = path.offset, path.offset + len(path)
+        # same tail as radius_list on the window: the last radius with enough points ahead is repeated
+        count = len(path) - 2 * self.step_size - self.base_offset
+        if count > 0:
+            R_list = self.R_full[s_idx:s_idx+count]
+            R_list.extend([R_list[-1]] * (len(path) - count))
+        else:
+            R_list = [99999.0] * len(path)
+        return self.path_list[s_idx:e_idx], R_list, self.vel_list[s_idx:e_idx]
+
+class RoutePrefetcher:
+    # keeps a route from the latest pose to every goal ready in the background, so a mode switch
+    # swaps one in instead of planning. a route is handed out only while it is younger than max_age
+    # and still passes within max_offset of the current pose (e.g. not planned from the old lane).
+    # a goal is replanned only once its route is older than max_age/2 or the pose has left it, and
+    # only while wanted(key) says its mode switch can happen. the planner's traffic costs are
+    # refreshed from get_objects before a round that replans
+    def __init__(self, planner, get_pose, goals, get_objects=None, wanted=None, max_age=2.0, max_offset=1.5, period=0.2, window=200):
+        self.planner = planner
+        self.get_pose = get_pose
+        self.get_objects = get_objects
+        self.goals = goals  # key -> (point, name)
+        self.wanted = wanted
+        self.max_age = max_age
+        self.max_offset = max_offset
+        self.period = period
+        self.window = window
+        self.routes = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def stale(self, key, pos):
+        with self.lock:
+            stamp, route = self.routes.get(key, (None, None))
+        if stamp is None or time.time() - stamp > self.max_age / 2:
+            return True
+        return route is not None and np.min(distances_to(route.xy[:self.window], pos)) > self.max_offset
+
+    def run(self):
+        while not self.stop_event.is_set():
+            pos = self.get_pose()
+            keys = []
+            if pos is not None:
+                keys = [key for key in self.goals if (self.wanted is None or self.wanted(key)) and self.stale(key, pos)]
+            if len(keys) > 0 and self.get_objects is not None:
+                self.planner.update_traffic(self.get_objects())
+            for key in keys:
+                pos = self.get_pose()
+                if pos is None or self.stop_event.is_set():
+                    break
+                point, name = self.goals[key]
+                stamp = time.time()
+                result, route = self.planner.get_shortest_path(pos, point, name, log=False)
+                with self.lock:
+                    self.routes[key] = (stamp, route if result else None)
+            self.stop_event.wait(self.period)
+
+    def get(self, key, pos):
+        with self.lock:
+            stamp, route = self.routes.get(key, (None, None))
+        if route is None or time.time() - stamp > self.max_age:
+            return None
+        if np.min(distances_to(route.xy[:self.window], pos)) > self.max_offset:
+            return None
+        return route
+
 def calc_overtaking_by_ttc(obj_dist, obj_vel, ego_vel,max_th= 15):
     rel_vel = ego_vel-obj_vel
     if rel_vel > 0:
@@ -300,18 +367,54 @@ def has_different_lane_number(prev, current):
     else:
         return False
 
-def check_avoidance_gap_over(lc_state, l_width, r_width, lat_avoidance_gap, d):
-    overed = True
+def get_avoidance_gap(lc_state, lat_avoidance_gap, d):
     if lc_state == 'left':
-        avoidance_gap = lat_avoidance_gap+d
-        if avoidance_gap < l_width-0.2:
-            overed = False
+        return lat_avoidance_gap+d
     else:
-        avoidance_gap = lat_avoidance_gap-d
-        if avoidance_gap < r_width-0.2:
-            overed = False
+        return lat_avoidance_gap-d
+
+def check_avoidance_gap_over(lc_state, l_width, r_width, lat_avoidance_gap, d):
+    overed = True
+    avoidance_gap = get_avoidance_gap(lc_state, lat_avoidance_gap, d)
+    width = l_width if lc_state == 'left' else r_width
+    if avoidance_gap < width-0.2:
+        overed = False
     return overed, avoidance_gap
 
+def get_avoidance_shift(trim_path, obj_xy, obj_radius, obj_gap, obj_passable, lc_state):
+    # lateral shift of every path point for one lane change direction.
+    # an object can be passed at a point if it is passable at all and its gap fits the lane width there.
+    # shifting starts at the first (point, object) pair within the object radius and from then on
+    # applies wherever an object can be passed, the last such object (in s order) setting the gap
+    num_points, num_objs = len(trim_path), len(obj_gap)
+    shift = np.zeros(num_points)
+    shifted = np.zeros(num_points, dtype=bool)
+    if num_objs == 0:
+        return False, shift, shifted
+
+    widths = trim_path.w_left if lc_state == 'left' else trim_path.w_right
+    passable = obj_passable[np.newaxis, :] & (obj_gap[np.newaxis, :] < widths[:, np.newaxis]-0.2)
+    if not passable.any():
+        return False, shift, shifted
+
+    points = trim_path.xy
+    dists = np.sqrt((obj_xy[np.newaxis, :, 0]-points[:, np.newaxis, 0])**2 + (obj_xy[np.newaxis, :, 1]-points[:, np.newaxis, 1])**2)
+    trigger = (passable & (dists <= obj_radius[np.newaxis, :])).ravel()
+    if trigger.any():
+        active = passable & (np.arange(num_points*num_objs) >= np.argmax(trigger)).reshape(num_points, num_objs)
+        shifted = active.any(axis=1)
+        last_obj = num_objs - 1 - np.argmax(active[:, ::-1], axis=1)
+        gap = obj_gap[last_obj]
+        shift = np.where(shifted, gap if lc_state == 'left' else -gap, 0.0)
+    return True, shift, shifted
+
+def shift_path(trim_path, shift, shifted):
+    final_path = trim_path.copy()
+    normvec = trim_path.normvec[shifted]
+    final_path.data[shifted, 0] = trim_path.x[shifted] + (-1 * normvec[:, 0]) * shift[shifted]
+    final_path.data[shifted, 1] = trim_path.y[shifted] + (-1 * normvec[:, 1]) * shift[shifted]
+    return final_path
+
 def get_selected_lane(max_vel, lane_number):
     if max_vel < 80/3.6:
         if lane_number == 1 or lane_number == 0:
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# replays recorded planning inputs through the planning logic without a ROS master, faster than real time.
+#   python3 replay.py record.jsonl --out out.jsonl [--compare ref.jsonl]
+#   python3 replay.py --from-bag drive.bag record.jsonl
+# a recording has one {"t": sec, "topic": ..., "values": {...}} per line, values as ros_handler.TOPICS converts them
+import os
+import sys
+toppath = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(toppath)
+
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+import yaml
+
+import ros_handler
+from planning import Planning
+
+INIT_PERIOD = 1/20
+STEP_PERIOD = 1/5
+
+
+class ReplayHandler(ros_handler.ROSHandler):
+    # ROSHandler state and callbacks on recorded values, parameters from the rosparam yaml
+    # and the published local paths kept in outputs instead of sent
+    def __init__(self, params):
+        self.params = params
+        self.data_cond = threading.Condition()
+        self.data_seq = {'pose': 0, 'detection': 0}
+        self.data_stamp = {'pose': 0.0, 'detection': 0.0}
+        self.now = 0.0
+        self.outputs = []
+        self.set_values()
+
+    def get_param(self, name, *default):
+        if len(default) > 0:
+            return self.params.get(name.lstrip('/'), default[0])
+        return self.params[name.lstrip('/')]
+
+    def apply(self, record):
+        self.now = record['t']
+        getattr(self, ros_handler.TOPICS[record['topic']][1])(record['values'])
+
+    def publish(self, local_action_set, target_velocity, race_mode):
+        pass
+
+    def publish2(self, local_path, R_list, velocity_list, target_velocity, race_mode, planning_mode, origin=None):
+        if local_path is not None and len(local_path) > 0:
+            self.outputs.append({'t': self.now, 'race_mode': str(race_mode), 'planning_mode': str(planning_mode),
+                                 'target_velocity': float(target_velocity), 'path': np.asarray(local_path)[:, :2].tolist(),
+                                 'R': np.asarray(R_list, dtype=np.float64).tolist(), 'v': np.asarray(velocity_list, dtype=np.float64).tolist()})
+
+    def publish_target_object(self, object_list):
+        pass
+
+    def publish_global_path(self, waypoints):
+        pass
+
+    def publish_warning(self, value):
+        pass
+
+    def publish_cycle_latency(self, latency):
+        pass
+
+
+def read_jsonl(file_path):
+    with open(file_path, 'r') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+def write_jsonl(file_path, records):
+    with open(file_path, 'w') as file:
+        for record in records:
+            file.write(json.dumps(record) + '\n')
+
+def from_bag(bag_path, out_path):
+    import rosbag
+    records = []
+    with rosbag.Bag(bag_path) as bag:
+        for topic, msg, t in bag.read_messages(topics=list(ros_handler.TOPICS)):
+            records.append({'t': t.to_sec(), 'topic': topic, 'values': ros_handler.TOPICS[topic][0](msg)})
+    write_jsonl(out_path, records)
+    return len(records)
+
+def replay(records, params):
+    # initd and executed are run in turn on the recording clock, at their live rates
+    records = sorted(records, key=lambda record: record['t'])
+    handler = ReplayHandler(params)
+    n = 0
+    while n < len(records) and (handler.map_name is None or handler.local_pos is None):
+        handler.apply(records[n])
+        n += 1
+    if handler.map_name is None or handler.local_pos is None:
+        raise ValueError('recording has no system status or vehicle state')
+    start_time = time.perf_counter()
+    planning = Planning(handler, prefetch=False, log_csv=False)
+    setup_time = time.perf_counter() - start_time
+
+    timings = {'init_step': []}
+    next_init = next_step = handler.now
+    start_time = time.perf_counter()
+    for record in records[n:] + [None]:
+        t = record['t'] if record is not None else handler.now + STEP_PERIOD
+        while min(next_init, next_step) <= t:
+            handler.now = min(next_init, next_step)
+            if next_init <= next_step:
+                next_init += INIT_PERIOD
+                if handler.local_pos is None:
+                    continue
+                lap_time = time.perf_counter()
+                planning.init_step()
+                timings['init_step'].append(time.perf_counter() - lap_time)
+            else:
+                next_step += STEP_PERIOD
+                if not planning.first_initialized or handler.local_pos is None:
+                    continue
+                if handler.current_signal == 5:
+                    planning.reset()
+                    continue
+                planning.step()
+                for name, lap in planning.timings.items():
+                    timings.setdefault(name, []).append(lap)
+        if record is not None:
+            handler.apply(record)
+    run_time = time.perf_counter() - start_time
+    duration = records[-1]['t'] - records[n-1]['t'] if n > 0 and records else 0.0
+    return handler.outputs, timings, setup_time, run_time, duration
+
+def compare(outputs, reference, tol=1e-6):
+    # number of cycles that differ from the reference beyond tol, with a short report per cycle
+    diffs = []
+    if len(outputs) != len(reference):
+        diffs.append(f'cycles: {len(outputs)} vs {len(reference)}')
+    for n, (a, b) in enumerate(zip(outputs, reference)):
+        notes = [key for key in ['race_mode', 'planning_mode'] if a[key] != b[key]]
+        if abs(a['target_velocity'] - b['target_velocity']) > tol:
+            notes.append(f"target_velocity {a['target_velocity']:.3f} vs {b['target_velocity']:.3f}")
+        for key in ['path', 'R', 'v']:
+            x, y = np.asarray(a[key]), np.asarray(b[key])
+            if x.shape != y.shape:
+                notes.append(f'{key} shape {x.shape} vs {y.shape}')
+            elif len(x) > 0 and np.max(np.abs(x - y)) > tol:
+                notes.append(f'{key} max diff {np.max(np.abs(x - y)):.6f}')
+        if len(notes) > 0:
+            diffs.append(f"t={a['t']:.2f}: " + ', '.join(notes))
+    return diffs
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('record', help='recording (json lines), or the bag with --from-bag')
+    parser.add_argument('out', nargs='?', help='recording written by --from-bag')
+    parser.add_argument('--from-bag', action='store_true', help='convert a rosbag of the subscribed topics into a recording')
+    parser.add_argument('--params', default=f'{toppath}/../manager/coordinates.yaml')
+    parser.add_argument('--out', dest='output', help='write the published paths (json lines)')
+    parser.add_argument('--compare', help='published paths of a previous replay to compare against')
+    parser.add_argument('--tol', type=float, default=1e-6)
+    args = parser.parse_args()
+
+    if args.from_bag:
+        print(f'{from_bag(args.record, args.out)} messages written to {args.out}')
+        return
+
+    with open(args.params, 'r') as file:
+        params = yaml.safe_load(file)
+    outputs, timings, setup_time, run_time, duration = replay(read_jsonl(args.record), params)
+
+    print(f'setup {setup_time:.2f} s, replayed {duration:.1f} s in {run_time:.2f} s '
+          f'({duration / max(run_time, 1e-9):.1f}x real time), {len(outputs)} published paths')
+    for name, laps in timings.items():
+        if len(laps) > 0:
+            laps = np.array(laps) * 1000
+            print(f'  {name:12s}: mean {laps.mean():7.3f} ms, p95 {np.percentile(laps, 95):7.3f} ms, max {laps.max():7.3f} ms ({len(laps)})')
+    if args.output is not None:
+        write_jsonl(args.output, outputs)
+    if args.compare is not None:
+        diffs = compare(outputs, read_jsonl(args.compare), args.tol)
+        print(f'{len(diffs)} differences to {args.compare}')
+        for diff in diffs[:20]:
+            print(f'  {diff}')
+        sys.exit(1 if len(diffs) > 0 else 0)
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,55 @@
 import rospy
 import math
+import time
+import threading
 import numpy as np
 
 from drive_msgs.msg import *
 from geometry_msgs.msg import Point
 from nav_msgs.msg import Path
 from geometry_msgs.msg import PoseStamped
-from std_msgs.msg import Int8MultiArray, Int8
+from std_msgs.msg import Int8MultiArray, Int8, Float32
+
+def system_status_values(msg):
+    return {'map_name': msg.mapName.data, 'system_mode': msg.systemMode.data, 'system_signal': msg.systemSignal.data,
+            'lap_count': msg.lapCount.data, 'kiapi_signal': msg.kiapiSignal.data, 'system_health': msg.systemHealth.data}
+
+def lane_data_values(msg):
+    return {'lane_id': msg.currentLane.id.data, 'lane_number': msg.currentLane.laneNumber.data}
+
+def vehicle_state_values(msg):
+    return {'stamp': msg.header.stamp.to_sec(), 'velocity': msg.velocity.data, 'heading': msg.heading.data,
+            'lat': msg.position.x, 'long': msg.position.y, 'enu_x': msg.enu.x, 'enu_y': msg.enu.y}
+
+def ccan_output_values(msg):
+    return {'left': int(msg.CF_Lca_IndLeft.data), 'right': int(msg.CF_Lca_IndRight.data)}
+
+def lidar_bsd_values(msg):
+    return {'left': int(msg.data[0]), 'right': int(msg.data[1])}
+
+def detection_data_values(msg):
+    return {'objects': [{'x': obj.position.x, 'y': obj.position.y, 'heading': obj.heading.data, 'v': obj.velocity.data,
+                         'dist': obj.distance.data} for obj in msg.objects]}
+
+# subscribed topic -> (message to plain values, handler on those values), used to record and replay them
+TOPICS = {
+    '/SystemStatus': (system_status_values, 'on_system_status'),
+    '/LaneData': (lane_data_values, 'on_lane_data'),
+    '/VehicleState': (vehicle_state_values, 'on_vehicle_state'),
+    '/CCANOutput': (ccan_output_values, 'on_ccan_output'),
+    '/map_lane/lidar_bsd': (lidar_bsd_values, 'on_lidar_bsd'),
+    '/DetectionData': (detection_data_values, 'on_detection_data'),
+}
 
 class ROSHandler():
     def __init__(self):
         rospy.init_node('planning', anonymous=False)
-        
+
+        # notified by the callbacks planning waits on, stamps are the arrival times of the latest messages
+        self.data_cond = threading.Condition()
+        self.data_seq = {'pose': 0, 'detection': 0}
+        self.data_stamp = {'pose': 0.0, 'detection': 0.0}
+
         self.set_values()
         self.set_publisher_protocol()
         self.set_subscriber_protocol()
@@ -31,6 +69,7 @@ class ROSHandler():
         self.left_lidar_bsd_detect = 0
         self.right_lidar_bsd_detect = 0
         self.local_pos = None
+        self.local_pose = None
         self.prev_start_pos = [0,0]
         self.object_list = []
         self.transformer = None
@@ -48,6 +87,7 @@ class ROSHandler():
         self.global_path_pub = rospy.Publisher('/global_path', Path, queue_size=1)
         self.target_object_pub = rospy.Publisher('/planning/target_object', DetectionData, queue_size=1)
         self.planning_warning_pub = rospy.Publisher('/planning/warning', Int8, queue_size=1)
+        self.cycle_latency_pub = rospy.Publisher('/planning/cycle_latency', Float32, queue_size=1)
         
     def set_subscriber_protocol(self):
         rospy.Subscriber('/VehicleState', VehicleState, self.vehicle_state_cb)
@@ -58,44 +98,79 @@ class ROSHandler():
         rospy.Subscriber('/map_lane/lidar_bsd', Int8MultiArray, self.lidar_bsd_cb)
 
     def system_status_cb(self, msg: SystemStatus):
-        self.map_name = msg.mapName.data   
-        self.system_mode = msg.systemMode.data 
-        self.current_signal = msg.systemSignal.data
-        self.lap_count = msg.lapCount.data
-        self.kiapi_signal = msg.kiapiSignal.data
-        self.system_health = msg.systemHealth.data
-        #0:None, 1:Go, 2:Stop, 3:Slow On, 4:Slow Off, 5:Pit Stop
-        if not self.set_go and self.kiapi_signal == 1:
-            self.set_go = True
-        
-        
+        self.on_system_status(system_status_values(msg))
+
     def lane_data_cb(self, msg: LaneData):
-        self.current_lane_id = str(msg.currentLane.id.data)
-        self.current_lane_number =  int(msg.currentLane.laneNumber.data)
+        self.on_lane_data(lane_data_values(msg))
 
-    
     def vehicle_state_cb(self, msg):
-        self.current_velocity = msg.velocity.data
-        self.current_heading = msg.heading.data
-        self.current_positdion_lat = msg.position.x
-        self.current_position_long = msg.position.y
-        self.local_pos = (msg.enu.x, msg.enu.y)
+        self.on_vehicle_state(vehicle_state_values(msg))
     
     def ccan_output_cb(self, msg: CCANOutput):
-        self.left_bsd_detect = int(msg.CF_Lca_IndLeft.data) # 0 : none, 1 : detect
-        self.right_bsd_detect = int(msg.CF_Lca_IndRight.data) 
+        self.on_ccan_output(ccan_output_values(msg))
     
     def lidar_bsd_cb(self, msg):
-        self.left_lidar_bsd_detect = int(msg.data[0])
-        self.right_lidar_bsd_detect = int(msg.data[1])
+        self.on_lidar_bsd(lidar_bsd_values(msg))
 
     def detection_data_cb(self, msg):
+        self.on_detection_data(detection_data_values(msg))
+
+    # the callbacks on plain values, shared with the replay handler
+    def on_system_status(self, values):
+        self.map_name = values['map_name']
+        self.system_mode = values['system_mode']
+        self.current_signal = values['system_signal']
+        self.lap_count = values['lap_count']
+        self.kiapi_signal = values['kiapi_signal']
+        self.system_health = values['system_health']
+        #0:None, 1:Go, 2:Stop, 3:Slow On, 4:Slow Off, 5:Pit Stop
+        if not self.set_go and self.kiapi_signal == 1:
+            self.set_go = True
+        with self.data_cond:
+            self.data_cond.notify_all()
+
+    def on_lane_data(self, values):
+        self.current_lane_id = str(values['lane_id'])
+        self.current_lane_number = int(values['lane_number'])
+
+    def on_vehicle_state(self, values):
+        self.current_velocity = values['velocity']
+        self.current_heading = values['heading']
+        self.current_positdion_lat = values['lat']
+        self.current_position_long = values['long']
+        self.local_pos = (values['enu_x'], values['enu_y'])
+        # stamp, position and heading of one message, sent with the local path planned from it
+        self.local_pose = (values['stamp'], values['enu_x'], values['enu_y'], values['heading'])
+        self.data_received('pose')
+
+    def on_ccan_output(self, values):
+        self.left_bsd_detect = int(values['left']) # 0 : none, 1 : detect
+        self.right_bsd_detect = int(values['right'])
+
+    def on_lidar_bsd(self, values):
+        self.left_lidar_bsd_detect = int(values['left'])
+        self.right_lidar_bsd_detect = int(values['right'])
+
+    def on_detection_data(self, values):
         object_list = []
-        position_list = []
-        for i, object in enumerate(msg.objects):
-            object_list.append({'X': object.position.x, 'Y': object.position.y, 'theta': math.radians(object.heading.data), 'type': 'physical', 'id': i, 'length': 4.0, 'v': object.velocity.data, 'dist': object.distance.data})
-            position_list.append([object.position.x, object.position.y])
+        for i, object in enumerate(values['objects']):
+            object_list.append({'X': object['x'], 'Y': object['y'], 'theta': math.radians(object['heading']), 'type': 'physical', 'id': i, 'length': 4.0, 'v': object['v'], 'dist': object['dist']})
         self.object_list = object_list
+        self.data_received('detection')
+
+    def data_received(self, source):
+        with self.data_cond:
+            self.data_seq[source] += 1
+            self.data_stamp[source] = time.time()
+            self.data_cond.notify_all()
+
+    def get_param(self, name, *default):
+        # get_param(name, default) falls back to default when the parameter is not set
+        return rospy.get_param(name, *default)
+
+    def wait_for(self, predicate, timeout=None):
+        with self.data_cond:
+            return self.data_cond.wait_for(predicate, timeout)
 
     def publish(self, local_action_set, target_velocity, race_mode):
         
@@ -112,9 +187,15 @@ class ROSHandler():
             self.navigation_data_pub.publish(self.navigation_data)
             
     
-    def publish2(self, local_path, R_list, velocity_list, target_velocity, race_mode, planning_mode):
+    def publish2(self, local_path, R_list, velocity_list, target_velocity, race_mode, planning_mode, origin=None):
         if local_path is not None and len(local_path) > 0:
             self.navigation_data = NavigationData()
+            if origin is not None:
+                stamp, x, y, heading = origin
+                self.navigation_data.header.stamp = rospy.Time.from_sec(stamp)
+                self.navigation_data.currentLocation.x = x
+                self.navigation_data.currentLocation.y = y
+                self.navigation_data.currentHeading.data = heading
             self.navigation_data.targetVelocity.data = target_velocity
             self.navigation_data.raceMode.data = str(race_mode)
             self.navigation_data.planningMode.data = str(planning_mode)
@@ -164,4 +245,7 @@ class ROSHandler():
         return action_mean / 5
     
     def publish_warning(self, value):
-        self.planning_warning_pub.publish(Int8(value))
\ No newline at end of file
+        self.planning_warning_pub.publish(Int8(value))
+
+    def publish_cycle_latency(self, latency):
+        self.cycle_latency_pub.publish(Float32(latency))
@@ -0,0 +1,53 @@
+import time
+
+
+class PlanningScheduler:
+    # wakes the planning cycle on new pose / detection data instead of polling at a fixed rate.
+    # the first new message opens a coalescing window so that the other source of the same instant is
+    # planned with it. a cycle that would start less than min_period after the previous one is held
+    # back until then (the per cycle tuning assumes at most 5 Hz, planning reads both from rosparams),
+    # and a cycle runs anyway once idle_timeout passes without data
+    def __init__(self, ros_handler, sources=('pose', 'detection'), coalesce=0.02, min_period=0.2, idle_timeout=0.5):
+        if idle_timeout <= min_period:
+            raise ValueError('idle_timeout has to be longer than min_period')
+        self.RH = ros_handler
+        self.sources = sources
+        self.coalesce = coalesce
+        self.min_period = min_period
+        self.idle_timeout = idle_timeout
+        self.seen = {source: ros_handler.data_seq[source] for source in sources}
+        self.last_start = 0.0
+
+    def fresh(self):
+        return [source for source in self.sources if self.RH.data_seq[source] != self.seen[source]]
+
+    def wait(self, shutdown_event):
+        # returns when the data the cycle is planned on arrived, the oldest of the latest messages of the
+        # fresh sources (now when idle)
+        cond = self.RH.data_cond
+        with cond:
+            if cond.wait_for(lambda: len(self.fresh()) > 0, max(self.last_start + self.idle_timeout - time.time(), 0)):
+                first = min(self.RH.data_stamp[source] for source in self.fresh())
+                cond.wait_for(lambda: len(self.fresh()) == len(self.sources), max(first + self.coalesce - time.time(), 0))
+
+        # only a cycle that comes too early is delayed, the data arriving meanwhile is planned with it
+        remaining = self.last_start + self.min_period - time.time()
+        if remaining > 0 and shutdown_event.wait(remaining):
+            return time.time()
+        with cond:
+            fresh = self.fresh()
+            trigger = min(self.RH.data_stamp[source] for source in fresh) if len(fresh) > 0 else time.time()
+            self.seen = {source: self.RH.data_seq[source] for source in self.sources}
+        self.last_start = time.time()
+        return trigger
+
+class StageTimer:
+    # wall time of the consecutive stages of one cycle, seconds by stage name
+    def __init__(self):
+        self.laps = {}
+        self.last = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.laps[name] = now - self.last
+        self.last = now
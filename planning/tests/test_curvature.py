@@ -0,0 +1,100 @@
+import os
+import sys
+import json
+from math import atan2
+
+import numpy as np
+
+toppath = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(f'{toppath}/global_path/libs')
+
+import curvature
+
+MAP_FILE = f'{os.path.dirname(toppath)}/map_lane/hd_map/maps/KIAPI_City.json'
+LANELET = '39'
+WINDOW_SIZE = 15
+
+
+# per-point code the array versions replaced (gp_utils.calc_kappa, the global path kappa/psi loops
+# and planning_handler.calculate_R_list)
+def legacy_calc_kappa(epoints, npoints):
+    if abs(npoints[1][1]-epoints[1]) == 0 or abs(npoints[1][0]-epoints[0]) == 0:
+        Rk = 0
+    elif abs(npoints[0][1]-epoints[1]) == 0 or abs(npoints[0][0]-epoints[0]) == 0:
+        Rk = 0
+    else:
+        if abs(npoints[1][1]-epoints[1]) < abs(npoints[1][0]-epoints[0]):
+            dydx2 = (npoints[1][1]-epoints[1])/(npoints[1][0]-epoints[0])
+            dydx1 = (npoints[0][1]-epoints[1])/(npoints[0][0]-epoints[0])
+            dydx = (dydx2+dydx1)/2
+            d2ydx2 = 2*(dydx2-dydx1)/(npoints[1][0]-npoints[0][0])
+            Rk = d2ydx2/((1+(dydx)**2)**(3/2))
+        else:
+            dxdy2 = (npoints[1][0]-epoints[0])/(npoints[1][1]-epoints[1])
+            dxdy1 =(npoints[0][0]-epoints[0])/(npoints[0][1]-epoints[1])
+            dxdy = (dxdy2+dxdy1)/2
+            d2xdy2 = 2*(dxdy2-dxdy1)/(npoints[1][1]-npoints[0][1])
+            Rk = d2xdy2/((1+(dxdy)**2)**(3/2))
+    return Rk
+
+def legacy_path_kappa(points, window_size):
+    kappas = []
+    for i, f in enumerate(points):
+        before_after_pts = [points[max(0, i-window_size)], points[min(len(points)-1, i+window_size)]]
+        kappas.append(legacy_calc_kappa(f, before_after_pts))
+    return kappas
+
+def legacy_path_heading(points, window_size):
+    thetas = []
+    for i in range(len(points)):
+        pts = [points[max(0, i-window_size)], points[min(len(points)-1, i+window_size)]]
+        thetas.append(atan2(pts[1][1]-pts[0][1], pts[1][0]-pts[0][0]))
+    return thetas
+
+def legacy_R_list(points, base_offset=2, step_size=40):
+    Rs = []
+    numpoints = len(points)
+    last_R = 99999
+    last_offset = step_size * 2
+
+    for i in range(numpoints):
+        if i + base_offset < numpoints - last_offset:
+            epoints = points[i + base_offset]
+            npoints = [points[i + base_offset + step_size], points[i + base_offset + 2 * step_size]]
+            kappa = legacy_calc_kappa(epoints, npoints)
+            R = abs(1 / kappa) if kappa != 0 else 99999
+            last_R = R
+            Rs.append(R)
+        else:
+            Rs.append(last_R)
+    return Rs
+
+def map_segment():
+    with open(MAP_FILE, 'r') as file:
+        return json.load(file)['lanelets'][LANELET]['waypoints']
+
+def assert_same(a, b):
+    # numpy's pow may differ from the C library one in the last bit
+    np.testing.assert_allclose(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64), rtol=1e-12, atol=0)
+
+
+def test_path_kappa():
+    points = map_segment()
+    assert_same(curvature.path_kappa(points, WINDOW_SIZE), legacy_path_kappa(points, WINDOW_SIZE))
+
+def test_path_kappa_axis_aligned():
+    points = map_segment()
+    points = [[points[0][0], y] for _, y in points]
+    assert_same(curvature.path_kappa(points, WINDOW_SIZE), legacy_path_kappa(points, WINDOW_SIZE))
+
+def test_path_heading():
+    points = map_segment()
+    assert_same(curvature.path_heading(points, WINDOW_SIZE), legacy_path_heading(points, WINDOW_SIZE))
+
+def test_radius_list():
+    points = map_segment()
+    assert_same(curvature.radius_list(points), legacy_R_list(points))
+
+def test_radius_list_short():
+    points = map_segment()[:60]
+    assert_same(curvature.radius_list(points), legacy_R_list(points))
@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+import threading
+
+import pytest
+
+toppath = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(toppath)
+
+import scheduler as sc
+
+# scheduling slack of the test threads, generous for a loaded machine but well below the 0.1 s a
+# message waited for the next tick of the old fixed grid
+SLACK = 0.05
+
+
+class FakeHandler:
+    # the data_* members of ROSHandler the scheduler waits on
+    def __init__(self):
+        self.data_cond = threading.Condition()
+        self.data_seq = {'pose': 0, 'detection': 0}
+        self.data_stamp = {'pose': 0.0, 'detection': 0.0}
+
+    def data_received(self, source):
+        with self.data_cond:
+            self.data_seq[source] += 1
+            self.data_stamp[source] = time.time()
+            self.data_cond.notify_all()
+
+
+def send_later(handler, delay, *sources):
+    def send():
+        for source in sources:
+            handler.data_received(source)
+    timer = threading.Timer(delay, send)
+    timer.start()
+    return timer
+
+
+def started_scheduler():
+    handler = FakeHandler()
+    # the periods planning runs with
+    scheduler = sc.PlanningScheduler(handler)
+    # the first wait has no previous cycle to wait for
+    scheduler.wait(threading.Event())
+    return handler, scheduler
+
+
+def test_message_after_the_cap_starts_a_cycle_within_coalesce():
+    handler, scheduler = started_scheduler()
+    send_later(handler, scheduler.min_period * 1.5, 'pose')
+    scheduler.wait(threading.Event())
+    assert scheduler.last_start - handler.data_stamp['pose'] <= scheduler.coalesce + SLACK
+
+
+def test_both_sources_start_the_cycle_without_waiting_out_coalesce():
+    handler, scheduler = started_scheduler()
+    send_later(handler, scheduler.min_period * 1.5, 'pose', 'detection')
+    trigger = scheduler.wait(threading.Event())
+    assert trigger == handler.data_stamp['pose']
+    assert scheduler.last_start - handler.data_stamp['detection'] < SLACK
+
+
+def test_early_message_is_held_until_min_period():
+    handler, scheduler = started_scheduler()
+    previous_start = scheduler.last_start
+    send_later(handler, scheduler.min_period * 0.2, 'pose', 'detection')
+    scheduler.wait(threading.Event())
+    assert scheduler.last_start - previous_start >= scheduler.min_period
+    assert scheduler.last_start - previous_start <= scheduler.min_period + SLACK
+
+
+def test_cycle_runs_after_idle_timeout_without_data():
+    _, scheduler = started_scheduler()
+    previous_start = scheduler.last_start
+    scheduler.wait(threading.Event())
+    assert scheduler.idle_timeout <= scheduler.last_start - previous_start <= scheduler.idle_timeout + SLACK
+
+
+def test_idle_timeout_has_to_exceed_min_period():
+    with pytest.raises(ValueError):
+        sc.PlanningScheduler(FakeHandler(), min_period=0.2, idle_timeout=0.2)